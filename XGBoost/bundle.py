@@ -0,0 +1,142 @@
+"""
+模型包：一个 JSON 文件，包含 booster（UBJSON，base64）、城市词表和特征顺序
+
+版本 2（train.py 现在写出的格式）：城市为 xgboost 的原生类别特征，特征为 城市、房屋面积、楼层，
+城市编码为其在词表中的位置，矩阵宽度与城市数无关。
+版本 1：城市独热编码，每个城市一列（城市_X），再加上 房屋面积、楼层。两种版本都可以加载。
+
+train.py 训练完写出 rent_model.json，test.py 等预测脚本只加载模型包：不读训练数据，不需要 pandas 和 sklearn，
+启动时间与数据量无关。
+
+    bundle = ModelBundle.load('rent_model.json')
+    bundle.predict(['北京'], [80], [2])
+
+旧的 xgboost_gpu_model.json（训练时用 DataFrame，特征名里带有独热编码的城市）可以直接转换：
+    python bundle.py xgboost_gpu_model.json rent_model.json
+"""
+import base64
+import json
+import os
+import time
+
+import numpy as np
+
+bundle_format = 'rent-model'
+supported_versions = (1, 2)
+# 默认的模型包在本目录下，与当前工作目录无关（在仓库根目录运行 python XGBoost/test.py 也能找到）
+default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rent_model.json')
+
+city_prefix = '城市_'
+numeric_features = ['房屋面积', '楼层']
+
+
+class ModelBundle:
+    """booster + 城市词表 + 特征顺序。特征中有 城市 时为类别特征（版本 2），否则为各城市的独热编码列（版本 1）"""
+
+    def __init__(self, booster, cities, features, metadata=None):
+        self.booster = booster
+        self.cities = list(cities)
+        self.features = list(features)
+        self.metadata = metadata or {}
+        self.categorical = '城市' in self.features
+        self.version = 2 if self.categorical else 1
+        if self.categorical:
+            # 城市 -> 类别编码
+            self.city_column = self.features.index('城市')
+            self.city_values = {city: i for i, city in enumerate(self.cities)}
+        else:
+            # 城市 -> 独热编码列的位置
+            self.city_values = {city: self.features.index(city_prefix + city) for city in self.cities}
+        self.numeric_columns = [self.features.index(name) for name in numeric_features]
+
+    def encode(self, cities, areas, floors, unknown='error'):
+        """城市、面积、楼层 -> 按特征顺序排列的 float32 矩阵，见 encode_codes"""
+        labels, codes = np.unique(np.asarray(cities, dtype=object), return_inverse=True)
+        return self.encode_codes(codes.ravel(), labels, areas, floors, unknown)
+
+    def encode_codes(self, codes, labels, areas, floors, unknown='error'):
+        """
+        城市以 编码 + 词表 给出（如 Arrow 字典列、pandas 分类列，编码 -1 表示缺失），只对词表逐个查找，逐行的部分都是向量运算。
+        返回 (矩阵, 城市不在模型词表中的行的掩码)。unknown='error' 时遇到这样的行报 ValueError，
+        'ignore' 时这些行的城市按缺失值处理（类别编码为 NaN，或独热编码列全为 0）
+        """
+        areas = np.asarray(areas, dtype=np.float32)
+        codes = np.asarray(codes)
+        # 输入词表中的每个城市 -> 模型的类别编码或独热编码列的位置，最后一项对应编码 -1
+        values = np.array([self.city_values.get(label, -1) for label in labels] + [-1], dtype=np.intp)[codes]
+        missing = values < 0
+        if unknown == 'error' and missing.any():
+            city = labels[codes[np.argmax(missing)]] if codes[np.argmax(missing)] >= 0 else None
+            raise ValueError(f"未知的城市 {city}，可用的城市: {'、'.join(self.cities)}")
+        if self.categorical:
+            x = np.empty((len(areas), len(self.features)), dtype=np.float32)
+            x[:, self.city_column] = np.where(missing, np.nan, values)
+        else:
+            x = np.zeros((len(areas), len(self.features)), dtype=np.float32)
+            rows = np.flatnonzero(~missing)
+            x[rows, values[rows]] = 1
+        x[:, self.numeric_columns[0]] = areas
+        x[:, self.numeric_columns[1]] = np.asarray(floors, dtype=np.float32)
+        return x, missing
+
+    def predict(self, cities, areas, floors):
+        return self.booster.inplace_predict(self.encode(cities, areas, floors)[0])
+
+    def save(self, path=default_path):
+        content = {
+            'format': bundle_format,
+            'version': self.version,
+            'cities': self.cities,
+            'features': self.features,
+            'metadata': self.metadata,
+            'booster': base64.b64encode(self.booster.save_raw('ubj')).decode('ascii'),
+        }
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(content, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path=default_path):
+        import xgboost as xgb
+
+        with open(path, encoding='utf-8') as f:
+            content = json.load(f)
+        if content.get('format') != bundle_format:
+            raise ValueError(f"{path} 不是模型包")
+        if content.get('version') not in supported_versions:
+            raise ValueError(f"{path} 的模型包版本为 {content.get('version')}，只支持版本 {supported_versions}")
+        booster = xgb.Booster()
+        booster.load_model(bytearray(base64.b64decode(content['booster'])))
+        return cls(booster, content['cities'], content['features'], content['metadata'])
+
+    @classmethod
+    def from_booster(cls, booster, metadata=None):
+        """由训练时用独热编码、带特征名的 booster 得到（版本 1 的）模型包，城市词表取自独热编码列的特征名"""
+        features = booster.feature_names
+        if not features:
+            raise ValueError('booster 没有特征名，无法得到城市词表')
+        cities = [name[len(city_prefix):] for name in features if name.startswith(city_prefix)]
+        return cls(booster, cities, features, metadata)
+
+
+def training_metadata(**values):
+    """写入模型包的训练信息（训练时间等），值需能序列化为 JSON"""
+    return {'trained_at': time.strftime('%Y-%m-%d %H:%M:%S'), **values}
+
+
+if __name__ == '__main__':
+    import argparse
+
+    import xgboost as xgb
+
+    parser = argparse.ArgumentParser(description='把带特征名的 xgboost 模型文件转换为模型包')
+    parser.add_argument('model', help='xgboost 模型文件，如 xgboost_gpu_model.json')
+    parser.add_argument('output', nargs='?', default=default_path)
+    args = parser.parse_args()
+
+    booster = xgb.Booster()
+    booster.load_model(args.model)
+    bundle = ModelBundle.from_booster(booster, {'source': os.path.basename(args.model)})
+    print(f"已写出 {bundle.save(args.output)}（{len(bundle.cities)} 个城市，{len(bundle.features)} 个特征）")
@@ -0,0 +1,60 @@
+"""
+训练设备和线程数
+
+detect_device 在 device='auto' 时检测能否使用 GPU：xgboost 编译了 CUDA 支持且实际有可见的 GPU 才用 cuda，否则用 CPU。
+CPU 上用 hist 树方法，线程数等于本进程可用的核数（容器、taskset 限制后的核数，不是机器总核数）。
+交叉验证、参数搜索同时训练多个模型时，用 split_jobs 把核分给外层进程和每个模型的线程，
+避免 n_jobs=-1 的每个进程再各开满所有核的线程（核数的平方个线程互相争抢）。
+"""
+import os
+import warnings
+
+
+def cpu_threads():
+    """本进程可用的 CPU 核数"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def detect_device(device='auto'):
+    """返回 'cuda' 或 'cpu'。device 不是 auto 时原样返回"""
+    if device != 'auto':
+        return device
+    import numpy as np
+    import xgboost as xgb
+
+    if not xgb.build_info().get('USE_CUDA'):
+        return 'cpu'
+    # 没有可见 GPU 时 xgboost 只给出警告并改用 CPU，所以训练一棵很小的树，看实际使用的设备
+    import json
+
+    dtrain = xgb.DMatrix(np.zeros((2, 1)), label=np.zeros(2))
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        try:
+            booster = xgb.train({'device': 'cuda', 'tree_method': 'hist', 'verbosity': 0}, dtrain, 1)
+        except xgb.core.XGBoostError:
+            return 'cpu'
+    used = json.loads(booster.save_config())['learner']['generic_param']['device']
+    return 'cuda' if used.startswith('cuda') else 'cpu'
+
+
+def device_params(device, nthread=None):
+    """xgboost 的设备相关参数：GPU 用 cuda + hist；CPU 用 hist，线程数默认为可用核数"""
+    if device == 'cuda':
+        return {'tree_method': 'hist', 'device': 'cuda'}
+    return {'tree_method': 'hist', 'device': 'cpu', 'nthread': nthread or cpu_threads()}
+
+
+def split_jobs(num_fits, device, threads=None):
+    """
+    同时训练 num_fits 个模型时，返回 (外层并行进程数, 每个模型的线程数)。
+    GPU 上只用一个外层进程（多个进程抢同一块 GPU 更慢）；CPU 上外层进程数 × 线程数不超过核数
+    """
+    threads = threads or cpu_threads()
+    if device == 'cuda':
+        return 1, threads
+    jobs = max(1, min(num_fits, threads))
+    return jobs, max(1, threads // jobs)
@@ -0,0 +1,110 @@
+"""
+批量预测月租
+
+逐条调用 test.py 的 predict_rent 时，每一行都要单独编码、单独调用一次预测，开销远大于模型本身。
+这里整块编码（城市只对词表查找，逐行部分都是 numpy 向量运算），再用 inplace_predict 直接对 numpy 矩阵预测，
+不构造 DMatrix；按块处理，内存只与块大小有关，可以给上百万行的文件打分。
+
+    from bundle import ModelBundle
+    from score import score
+    rents = score(ModelBundle.load(), cities, areas, floors)
+
+    python score.py listings.csv -o scored.parquet      # CSV / Parquet / Arrow 文件或分片目录
+    python score.py ../extracted_data.arrow -o scored.arrow --chunk-rows 500000
+
+输入文件的列名兼容 dataset.py（城市、面积/房屋面积、楼层类型/楼层）。输出为 城市、面积、楼层类型、预测月租，
+城市不在模型词表中的行预测月租为空。
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from bundle import ModelBundle, default_path
+
+
+def score(bundle, cities, areas, floors, chunk_rows=1000000):
+    """对数组批量预测，返回 float32 数组；城市不在模型词表中的行为 NaN"""
+    areas = np.asarray(areas)
+    floors = np.asarray(floors)
+    labels, codes = np.unique(np.asarray(cities, dtype=object), return_inverse=True)
+    codes = codes.ravel()
+    output = np.empty(len(areas), dtype=np.float32)
+    for start in range(0, len(areas), chunk_rows):
+        end = start + chunk_rows
+        output[start:end] = score_codes(bundle, codes[start:end], labels, areas[start:end], floors[start:end])
+    return output
+
+
+def score_codes(bundle, codes, labels, areas, floors):
+    """一块数据的预测，城市以 编码 + 词表 给出（见 ModelBundle.encode_codes）"""
+    x, missing = bundle.encode_codes(codes, labels, areas, floors, unknown='ignore')
+    predictions = bundle.booster.inplace_predict(x)
+    predictions[missing] = np.nan
+    return predictions
+
+
+def score_batch(bundle, batch):
+    """对 dataset 统一格式的一个 RecordBatch 预测：城市是字典列，直接用其编码和字典"""
+    city = batch.column('城市')
+    codes = city.indices.fill_null(-1).to_numpy()
+    labels = city.dictionary.to_numpy(zero_copy_only=False)
+    return score_codes(bundle, codes, labels, batch.column('面积').to_numpy(zero_copy_only=False),
+                       batch.column('楼层类型').to_numpy(zero_copy_only=False))
+
+
+def open_writer(path, schema):
+    """按扩展名打开输出：.parquet / .csv / 其它为 Arrow IPC"""
+    import pyarrow as pa
+
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        return pq.ParquetWriter(path, schema, compression='zstd')
+    if path.endswith('.csv'):
+        import pyarrow.csv
+
+        return pyarrow.csv.CSVWriter(path, schema)
+    return pa.ipc.new_file(path, schema)
+
+
+def score_file(bundle, path, output, chunk_rows=1000000):
+    """分块读取 path 并预测，写出到 output，返回 (行数, 城市不在词表中的行数)"""
+    import pyarrow as pa
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from dataset import iter_batches
+
+    schema = pa.schema([('城市', pa.string()), ('面积', pa.float32()), ('楼层类型', pa.int8()),
+                        ('预测月租', pa.float32())])
+    rows = unknown = 0
+    tmp_path = output + '.tmp' + os.path.splitext(output)[1]
+    with open_writer(tmp_path, schema) as writer:
+        for batch in iter_batches(path, chunk_rows, columns=['城市', '面积', '楼层类型']):
+            predictions = score_batch(bundle, batch)
+            writer.write_batch(pa.record_batch([batch.column('城市').cast(pa.string()), batch.column('面积'),
+                                                batch.column('楼层类型'), pa.array(predictions, from_pandas=True)],
+                                               schema=schema))
+            rows += batch.num_rows
+            unknown += int(np.isnan(predictions).sum())
+    os.replace(tmp_path, output)
+    return rows, unknown
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='批量预测月租')
+    parser.add_argument('input', help='CSV / Parquet / Arrow 文件或分片目录')
+    parser.add_argument('-o', '--output', required=True, help='输出文件，扩展名 .parquet / .csv / .arrow')
+    parser.add_argument('--model', default=default_path, help='模型包，默认为 XGBoost/rent_model.json')
+    parser.add_argument('--chunk-rows', type=int, default=1000000, help='每块行数')
+    args = parser.parse_args()
+
+    bundle = ModelBundle.load(args.model)
+    start = time.perf_counter()
+    rows, unknown = score_file(bundle, args.input, args.output, args.chunk_rows)
+    elapsed = time.perf_counter() - start
+    print(f"{rows} 行已写出到 {args.output}，用时 {elapsed:.2f} s（{rows / max(elapsed, 1e-9):,.0f} 行/秒）")
+    if unknown:
+        print(f"{unknown} 行的城市不在模型词表中，预测月租为空")
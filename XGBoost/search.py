@@ -0,0 +1,202 @@
+"""
+超参数搜索：successive halving
+
+从参数空间中抽取不重复的候选参数（相同的组合只训练一次），第一轮每个候选只训练 min_rounds 轮，
+按验证集 RMSE 保留前 1/eta，下一轮接着已有的模型继续训练到 eta 倍轮数，直到剩一个候选或达到 max_rounds。
+大部分候选只花很少的轮数就被淘汰，算力集中在有希望的参数上；验证集 RMSE 连续 early_stopping_rounds 轮
+没有下降的试验提前结束（视为已收敛，不再占用算力）。
+
+- 所有试验共用同一个训练 QuantileDMatrix 和验证 QuantileDMatrix（沿用训练集的分箱），只分箱一次
+- 同一轮的试验放进线程池并行（xgboost 训练时释放 GIL），每一轮按剩下的候选数重新分配：
+  线程池大小 × 每个模型的线程数不超过核数（见 device.split_jobs），候选减少后每个模型分到更多线程
+- time_budget 为总的时间预算（秒）：用完后不再开始新的试验，正在训练的试验在当前这一轮提升后停止，返回目前最好的结果
+
+    result = successive_halving(dtrain, dvalid, sample_candidates(param_space, 27), base_params, device='cpu')
+    result['params'], result['rounds'], result['rmse']
+
+    python search.py --candidates 27 --time-budget 60     # 在数据集上搜索，打印最好的参数
+"""
+import itertools
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import xgboost as xgb
+
+from device import device_params, split_jobs
+
+# 默认的参数空间，包含原来 RandomizedSearchCV 中固定的那组参数
+param_space = {
+    'max_depth': [3, 4, 5, 6, 8],
+    'eta': [0.05, 0.1, 0.2],
+    'gamma': [0, 0.9],
+    'subsample': [0.8, 1],
+    'colsample_bytree': [0.7, 1],
+    'min_child_weight': [1, 5],
+    'reg_alpha': [0, 0.05, 1],
+    'reg_lambda': [1, 5],
+}
+default_params = {'max_depth': 3, 'gamma': 0.9, 'subsample': 1, 'colsample_bytree': 0.7, 'reg_alpha': 0.05,
+                  'reg_lambda': 1, 'eta': 0.1}
+
+
+def sample_candidates(space, count, seed=0, include=None):
+    """从参数空间中抽取 count 个不同的参数组合（组合总数不足时全部返回），include 排在最前面"""
+    names = sorted(space)
+    total = 1
+    for name in names:
+        total *= len(space[name])
+    if total <= count:
+        combos = [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+    else:
+        rng = random.Random(seed)
+        combos = [{name: rng.choice(space[name]) for name in names} for _ in range(count * 20)]
+    candidates, seen = [], set()
+    for params in ([include] if include else []) + combos:
+        key = tuple(sorted(params.items()))
+        if key not in seen:
+            seen.add(key)
+            candidates.append(dict(params))
+        if len(candidates) == count:
+            break
+    return candidates
+
+
+class Deadline(xgb.callback.TrainingCallback):
+    """时间预算用完时停止训练"""
+
+    def __init__(self, deadline):
+        super().__init__()
+        self.deadline = deadline
+
+    def after_iteration(self, model, epoch, evals_log):
+        return self.deadline is not None and time.perf_counter() > self.deadline
+
+
+class Trial:
+    """一个候选参数的训练状态：已训练的模型、轮数和验证集上最好的 RMSE"""
+
+    def __init__(self, number, params):
+        self.number = number
+        self.params = params
+        self.booster = None
+        self.rounds = 0
+        self.rmse = float('inf')
+        self.best_rounds = 0
+        self.converged = False
+        self.history = []
+
+    def advance(self, dtrain, dvalid, base_params, rounds, early_stopping_rounds=None, deadline=None):
+        """继续训练到 rounds 轮（在已有的模型上接着训练，不从头开始），返回是否训练完（含提前收敛）"""
+        if self.converged:
+            return True
+        evals_result = {}
+        # xgboost 的随机数引擎按线程共用，接着训练时不会重新设种子，行采样会受同一线程上之前的试验影响；
+        # seed_per_iteration 让每一轮按 seed + 轮次 取随机数，结果与线程调度、分几次训练都无关
+        params = {**base_params, **self.params, 'seed_per_iteration': True}
+        self.booster = xgb.train(params, dtrain, num_boost_round=rounds - self.rounds,
+                                 evals=[(dvalid, 'valid')], evals_result=evals_result, verbose_eval=False,
+                                 early_stopping_rounds=early_stopping_rounds, xgb_model=self.booster,
+                                 callbacks=[Deadline(deadline)])
+        for i, value in enumerate(evals_result['valid']['rmse']):
+            if value < self.rmse:
+                self.rmse, self.best_rounds = value, self.rounds + i + 1
+        self.rounds = self.booster.num_boosted_rounds()
+        self.history.append((self.rounds, self.rmse))
+        # 没训练到 rounds 轮：时间预算用完，或验证集 RMSE 不再下降
+        if self.rounds < rounds and not (deadline is not None and time.perf_counter() > deadline):
+            self.converged = True
+        return self.rounds >= rounds or self.converged
+
+
+def successive_halving(dtrain, dvalid, candidates, base_params, min_rounds=25, max_rounds=400, eta=3, device='cpu',
+                       threads=None, time_budget=None, early_stopping_rounds=20, log=print):
+    """
+    对 candidates 做 successive halving。base_params 为共同的参数（目标函数、评估指标等），
+    device、threads 为训练设备和总线程数，每一轮的并行试验数和每个模型的线程数由 split_jobs 按剩下的候选数决定。
+    返回最好的参数、轮数（验证集 RMSE 最低时的轮数）、RMSE 和全部试验的记录
+    """
+    start = time.perf_counter()
+    deadline = start + time_budget if time_budget else None
+    trials = [Trial(i, params) for i, params in enumerate(candidates)]
+    alive = trials
+    rounds = min(min_rounds, max_rounds)
+    rung = 0
+    while alive:
+        workers, model_threads = split_jobs(len(alive), device, threads)
+        params = {**base_params, **device_params(device, model_threads)}
+
+        def run(trial):
+            # 时间预算用完后不再开始新的试验
+            if deadline is not None and time.perf_counter() > deadline:
+                return False
+            return trial.advance(dtrain, dvalid, params, rounds, early_stopping_rounds, deadline)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            finished = [trial for trial, ok in zip(alive, pool.map(run, alive)) if ok]
+        log(f"第 {rung} 轮: {len(finished)}/{len(alive)} 个候选训练到 {rounds} 轮"
+            f"（{workers} 个并行 × {model_threads} 线程），"
+            f"最好的验证集 RMSE {min((t.rmse for t in alive), default=float('nan')):.2f}，"
+            f"累计 {time.perf_counter() - start:.1f} s")
+        if len(finished) < len(alive) or rounds >= max_rounds:
+            break
+        finished.sort(key=lambda t: t.rmse)
+        alive = finished[:max(1, len(finished) // eta)]
+        # 只剩一个候选时直接训练到 max_rounds
+        rounds = max_rounds if len(alive) == 1 else min(rounds * eta, max_rounds)
+        rung += 1
+
+    trained = [trial for trial in trials if trial.rounds]
+    if not trained:
+        raise RuntimeError('时间预算内没有完成任何试验')
+    best = min(trained, key=lambda t: t.rmse)
+    return {
+        'params': best.params,
+        'rounds': best.best_rounds,
+        'rmse': best.rmse,
+        'seconds': time.perf_counter() - start,
+        'booster': best.booster,
+        'trials': [{'number': t.number, 'params': t.params, 'rounds': t.rounds, 'best_rounds': t.best_rounds,
+                    'rmse': t.rmse, 'history': t.history} for t in trained],
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+    import os
+    import sys
+
+    from sklearn.model_selection import train_test_split
+
+    from device import cpu_threads, detect_device
+
+    parser = argparse.ArgumentParser(description='超参数搜索（successive halving）')
+    parser.add_argument('--device', choices=['auto', 'cpu', 'cuda'], default='auto')
+    parser.add_argument('--nthread', type=int, default=None, help='CPU 的总线程数，默认为可用核数')
+    parser.add_argument('--candidates', type=int, default=27, help='候选参数的个数')
+    parser.add_argument('--min-rounds', type=int, default=25, help='第一轮每个候选的训练轮数')
+    parser.add_argument('--max-rounds', type=int, default=400)
+    parser.add_argument('--eta', type=int, default=3, help='每一轮保留 1/eta 的候选，轮数乘以 eta')
+    parser.add_argument('--time-budget', type=float, default=None, help='时间预算（秒）')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from dataset import locate, read_dataset
+
+    data_path = locate('extracted_data.arrow', '../extracted_data.arrow', 'extracted_data.csv')
+    data = read_dataset(data_path, columns=['城市', '面积', '楼层类型', '月租']).rename(
+        columns={'面积': '房屋面积', '楼层类型': '楼层'})
+    X, y = data[['城市', '房屋面积', '楼层']], data['月租']
+    X_train, X_valid, y_train, y_valid = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    device = detect_device(args.device)
+    threads = args.nthread or cpu_threads()
+    candidates = sample_candidates(param_space, args.candidates, args.seed, include=default_params)
+    dtrain = xgb.QuantileDMatrix(X_train, label=y_train, nthread=threads, enable_categorical=True)
+    dvalid = xgb.QuantileDMatrix(X_valid, label=y_valid, ref=dtrain, nthread=threads, enable_categorical=True)
+    base_params = {'objective': 'reg:squarederror', 'eval_metric': 'rmse'}
+    result = successive_halving(dtrain, dvalid, candidates, base_params, args.min_rounds, args.max_rounds, args.eta,
+                                device, threads, args.time_budget)
+    print(json.dumps({name: result[name] for name in ['params', 'rounds', 'rmse', 'seconds']}, ensure_ascii=False))
@@ -0,0 +1,230 @@
+"""
+月租预测服务
+
+启动时加载模型包（rent_model.json，见 bundle.py；旧的 xgboost_gpu_model.json 可用 bundle.py 转换）。
+并发请求由 MicroBatcher 合并：第一个请求到达后最多再等 --max-wait-ms 毫秒（或凑满 --max-batch 行），
+整批编码后调用一次 inplace_predict，单次预测的固定开销由整批分摊。
+最近的 (城市, 面积, 楼层) 的结果放在 LRU 缓存里，命中时不进入批次。
+
+    python serve.py --port 8060 --max-wait-ms 2
+    GET  /predict?城市=北京&面积=80&楼层=2
+    POST /predict   [{"城市": "北京", "面积": 80, "楼层": 2}, ...]
+    GET  /health
+
+压测（在仓库根目录）: python -m benchmarks.loadtest --service predict --concurrency 16
+"""
+import json
+import queue
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from bundle import ModelBundle, default_path
+
+
+class PredictionError(RuntimeError):
+    """批次预测失败（编码或 xgboost 出错），与请求参数错误（ValueError）区分开"""
+
+
+class MicroBatcher:
+    """把并发请求的行合并成小批量，在一个后台线程中预测（booster 只在这个线程中使用）"""
+
+    def __init__(self, bundle, max_wait=0.002, max_batch=256):
+        self.bundle = bundle
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+        self.pending = queue.Queue()
+        self.batches = 0
+        self.batched_rows = 0
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def predict(self, rows):
+        """rows 为 [(城市, 面积, 楼层), ...]，阻塞到所在批次预测完，返回预测值列表（未知城市为 None）"""
+        item = {'rows': rows, 'done': threading.Event()}
+        self.pending.put(item)
+        item['done'].wait()
+        if 'error' in item:
+            # xgboost 的 XGBoostError 是 ValueError 的子类，包装一层，以免被当作参数错误
+            raise PredictionError(f"预测失败: {item['error']!r}") from item['error']
+        return item['result']
+
+    def run(self):
+        while True:
+            items = [self.pending.get()]
+            size = len(items[0]['rows'])
+            deadline = time.perf_counter() + self.max_wait
+            while size < self.max_batch:
+                # 等待时间用完后，已经在排队的请求仍然并入这一批
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = self.pending.get(timeout=remaining) if remaining > 0 else self.pending.get_nowait()
+                except queue.Empty:
+                    break
+                items.append(item)
+                size += len(item['rows'])
+            self.predict_batch(items)
+
+    def predict_batch(self, items):
+        rows = [row for item in items for row in item['rows']]
+        try:
+            cities, areas, floors = zip(*rows)
+            x, missing = self.bundle.encode(cities, areas, floors, unknown='ignore')
+            predictions = self.bundle.booster.inplace_predict(x).tolist()
+            for i in np.flatnonzero(missing):
+                predictions[i] = None
+        except Exception as e:
+            for item in items:
+                item['error'] = e
+                item['done'].set()
+            return
+        self.batches += 1
+        self.batched_rows += len(rows)
+        offset = 0
+        for item in items:
+            item['result'] = predictions[offset:offset + len(item['rows'])]
+            offset += len(item['rows'])
+            item['done'].set()
+
+
+class PredictionServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, model_path, cache_size=10000, max_wait=0.002, max_batch=256):
+        super().__init__(address, PredictionHandler)
+        self.model_path = model_path
+        self.bundle = ModelBundle.load(model_path)
+        self.batcher = MicroBatcher(self.bundle, max_wait, max_batch)
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def predict(self, rows):
+        """先查缓存，未命中的行合并进批次预测"""
+        results = [None] * len(rows)
+        todo = []
+        with self.lock:
+            for i, row in enumerate(rows):
+                if row in self.cache:
+                    self.cache.move_to_end(row)
+                    results[i] = self.cache[row]
+                    self.hits += 1
+                else:
+                    todo.append(i)
+                    self.misses += 1
+        if todo:
+            predictions = self.batcher.predict([rows[i] for i in todo])
+            with self.lock:
+                for i, value in zip(todo, predictions):
+                    results[i] = value
+                    if self.cache_size:
+                        self.cache[rows[i]] = value
+                        if len(self.cache) > self.cache_size:
+                            self.cache.popitem(last=False)
+        output = []
+        for (city, area, floor), value in zip(rows, results):
+            row = {'城市': city, '面积': area, '楼层': floor, '预测月租': None if value is None else round(value, 2)}
+            if value is None:
+                row['error'] = f'未知的城市 {city}'
+            output.append(row)
+        return output
+
+    def health(self):
+        with self.lock:
+            batches, batched_rows = self.batcher.batches, self.batcher.batched_rows
+            return {'model': self.model_path, 'cities': len(self.bundle.cities),
+                    'batches': batches, 'mean_batch_rows': round(batched_rows / batches, 2) if batches else None,
+                    'cache': {'size': len(self.cache), 'hits': self.hits, 'misses': self.misses}}
+
+
+def parse_row(values):
+    """{'城市', '面积', '楼层'} -> 缓存键 (城市, 面积, 楼层)，数值不合法时报 ValueError"""
+    try:
+        return str(values['城市']), float(values['面积']), int(values['楼层'])
+    except KeyError as e:
+        raise ValueError(f"缺少参数 {e.args[0]}") from None
+    except (TypeError, ValueError):
+        raise ValueError('面积须为数字，楼层须为整数') from None
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # 支持 keep-alive
+    disable_nagle_algorithm = True  # 同 fenxi_server.py：不关 Nagle 时每个请求要多等约 40ms
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        if parts.path == '/health':
+            self.send_json(self.server.health())
+        elif parts.path == '/predict':
+            params = {name: values[-1] for name, values in parse_qs(parts.query).items()}
+            self.answer(lambda: self.server.predict([parse_row(params)])[0])
+        else:
+            self.send_json({'error': 'not found'}, 404)
+
+    def do_POST(self):
+        if urlsplit(self.path).path != '/predict':
+            self.send_json({'error': 'not found'}, 404)
+            return
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+        def predict():
+            try:
+                rows = json.loads(body)
+            except ValueError:
+                raise ValueError('请求体须为 JSON 数组') from None
+            if not isinstance(rows, list):
+                raise ValueError('请求体须为 JSON 数组')
+            return self.server.predict([parse_row(row) for row in rows])
+
+        self.answer(predict)
+
+    def answer(self, predict):
+        """参数错误返回 400；预测出错等其它错误返回 500，客户端总能收到响应，keep-alive 连接保持可用"""
+        try:
+            result = predict()
+        except PredictionError as e:
+            self.send_json({'error': str(e)}, 500)
+            return
+        except ValueError as e:
+            self.send_json({'error': str(e)}, 400)
+            return
+        except Exception as e:
+            self.send_json({'error': f'服务器错误: {e!r}'}, 500)
+            return
+        self.send_json(result)
+
+    def send_json(self, result, status=200):
+        body = json.dumps(result, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='月租预测服务')
+    parser.add_argument('--model', default=default_path, help='模型包，默认为 XGBoost/rent_model.json')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8060)
+    parser.add_argument('--max-wait-ms', type=float, default=2.0, help='批次等待后续请求的最长时间（毫秒）')
+    parser.add_argument('--max-batch', type=int, default=256, help='每批最多行数')
+    parser.add_argument('--cache-size', type=int, default=10000, help='缓存的预测结果数，0 表示不缓存')
+    args = parser.parse_args()
+
+    server = PredictionServer((args.host, args.port), args.model, args.cache_size, args.max_wait_ms / 1000,
+                              args.max_batch)
+    print(f"模型包 {args.model} 已加载，服务地址 http://{args.host}:{args.port}/predict?城市=北京&面积=80&楼层=2",
+          flush=True)
+    server.serve_forever()
@@ -1,30 +1,15 @@
-import pandas as pd
-import xgboost as xgb
-from sklearn.preprocessing import OneHotEncoder
+import sys
 
-# 加载模型
-model_path = 'xgboost_gpu_model.json'
-model = xgb.Booster()
-model.load_model(model_path)
+from bundle import ModelBundle, default_path
 
-# 加载编码器
-data = pd.read_csv('extracted_data.csv')
-features = ['城市', '房屋面积', '楼层']
-encoder = OneHotEncoder(sparse_output=False)
-encoder.fit(data[['城市']])
+# 加载模型包（booster、城市词表和特征顺序，由 train.py 写出），不读取训练数据
+model_path = sys.argv[1] if len(sys.argv) > 1 else default_path
+bundle = ModelBundle.load(model_path)
 
 def predict_rent(city, area, floor):
     try:
-        # 独热编码城市特征
-        city_encoded = encoder.transform([[city]])
-        city_encoded_df = pd.DataFrame(city_encoded, columns=encoder.get_feature_names_out(['城市']))
-
-        # 创建最终的数据框
-        input_data = pd.concat([city_encoded_df, pd.DataFrame({'房屋面积': [area], '楼层': [floor]})], axis=1)
-
-        # 预测
-        dtest = xgb.DMatrix(input_data)
-        prediction = model.predict(dtest)[0]
+        # 城市按模型包的词表编码为类别特征（旧的版本 1 模型包为独热编码），按训练时的特征顺序排列后预测
+        prediction = bundle.predict([city], [area], [floor])[0]
 
         return f"预测月租: {prediction:.2f} 元"
     except Exception as e:
@@ -41,4 +26,4 @@ if __name__ == "__main__":
             result = predict_rent(city, area, floor)
             print(result)
         except ValueError:
-            print("请输入有效的数字。")
\ No newline at end of file
+            print("请输入有效的数字。")
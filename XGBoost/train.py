@@ -1,18 +1,37 @@
-import pandas as pd
+import argparse
+import os
+import sys
 import zhplot
-from sklearn.model_selection import train_test_split, RandomizedSearchCV
-from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import r2_score, root_mean_squared_error
 import xgboost as xgb
-from sklearn.preprocessing import OneHotEncoder
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from bundle import ModelBundle, training_metadata
+from device import cpu_threads, detect_device, device_params
+from search import default_params, param_space, sample_candidates, successive_halving
+
+parser = argparse.ArgumentParser(description='训练月租预测模型')
+parser.add_argument('--device', choices=['auto', 'cpu', 'cuda'], default='auto',
+                    help='训练设备，auto 在有可用 GPU 时用 cuda，否则用 CPU（见 device.py）')
+parser.add_argument('--nthread', type=int, default=None, help='CPU 训练的线程数，默认为可用核数')
+parser.add_argument('--candidates', type=int, default=27, help='超参数搜索的候选参数个数')
+parser.add_argument('--time-budget', type=float, default=None, help='超参数搜索的时间预算（秒），默认不限')
+args = parser.parse_args()
+device = detect_device(args.device)
+threads = args.nthread or cpu_threads()
+print(f"训练设备: {device}" + (f"，{threads} 个线程" if device == 'cpu' else ''))
+
 # 设置中文字体
 plt.rcParams['font.sans-serif'] = ['SimHei']  # 使用黑体
 plt.rcParams['axes.unicode_minus'] = False    # 解决负号显示问题
 
-# 读取CSV文件
-data = pd.read_csv('extracted_data.csv')
+# 读取清洗后的数据集（统一格式见 ../dataset.py），列名换成模型使用的 房屋面积、楼层
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dataset import locate, read_dataset
+data_path = locate('extracted_data.arrow', '../extracted_data.arrow', 'extracted_data.csv')
+data = read_dataset(data_path, columns=['城市', '面积', '楼层类型', '月租']).rename(columns={'面积': '房屋面积', '楼层类型': '楼层'})
 
 # 查看数据结构
 print(data.head())
@@ -25,66 +44,50 @@ target = '月租'
 X = data[features]
 y = data[target]
 
-# 对类别型特征进行独热编码
-encoder = OneHotEncoder(sparse_output=False)
-X_encoded = encoder.fit_transform(X[['城市']])
-
-# 合并独热编码后的特征和其他数值型特征
-X_encoded_df = pd.DataFrame(X_encoded, columns=encoder.get_feature_names_out(['城市']))
-X_final = pd.concat([X_encoded_df, X[['房屋面积', '楼层']].reset_index(drop=True)], axis=1)
+# 城市作为类别特征直接交给xgboost（原生类别支持），不展开成每个城市一列的独热编码，
+# 特征矩阵的宽度和直方图的大小都与城市数无关
+X['城市'] = X['城市'].astype('category')
+cities = list(X['城市'].cat.categories)
 
 # 数据集划分
-X_train, X_test, y_train, y_test = train_test_split(X_final, y, test_size=0.2, random_state=42)
+X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
-# 设置基础参数
+# 设置基础参数：hist树方法，设备和线程数见 device.py
 base_params = {
     'objective': 'reg:squarederror',
-    'tree_method': 'hist',  # 使用hist树方法
-    'device': 'cuda',       # 使用CUDA设备
+    **device_params(device, threads),
     'eval_metric': 'rmse'
 }
+max_rounds = 400
 
-# 定义随机搜索参数分布（已调整）
-param_dist = {'max_depth': [3],
-              'gamma': [0.9],
-              'subsample': [1],
-              'colsample_bytree': [0.7],
-              'reg_alpha':[0.05],
-              'reg_lambda':[1],
-              'eta':[0.1]}
-
-# 自定义评分函数以适应XGBRegressor
-def custom_scorer(estimator, X, y):
-    preds = estimator.predict(X)
-    return -mean_squared_error(y, preds, squared=False)  # RMSE
-
-# 使用RandomizedSearchCV进行超参数调优
-xgb_reg = xgb.XGBRegressor(tree_method='hist', device='cuda', objective='reg:squarederror')
-random_search = RandomizedSearchCV(
-    estimator=xgb_reg,
-    param_distributions=param_dist,
-    scoring=custom_scorer,
-    cv=3,
-    verbose=1,
-    n_jobs=-1,  # 确保只使用一个进程，以便GPU资源不会被分散
-    n_iter=150  # 随机搜索的迭代次数
-)
-random_search.fit(X_train, y_train)  # 直接使用DataFrame
+# 超参数搜索：successive halving（见 search.py），候选参数去重，按时间预算在各核之间调度。
+# 从训练集中再分出验证集，所有试验共用同一份分箱后的训练、验证矩阵
+X_fit, X_valid, y_fit, y_valid = train_test_split(X_train, y_train, test_size=0.2, random_state=42)
+dfit = xgb.QuantileDMatrix(X_fit, label=y_fit, nthread=threads, enable_categorical=True)
+dvalid = xgb.QuantileDMatrix(X_valid, label=y_valid, ref=dfit, nthread=threads, enable_categorical=True)
+candidates = sample_candidates(param_space, args.candidates, include=default_params)
+
+# 每一轮同时训练的试验数 × 每个模型的线程数不超过核数，候选淘汰后每个模型分到更多线程；
+# GPU 上一次只训练一个试验，以便GPU资源不会被分散
+search = successive_halving(dfit, dvalid, candidates, base_params, max_rounds=max_rounds, device=device,
+                            threads=threads, time_budget=args.time_budget)
+del dfit, dvalid
 
 # 最佳参数
-best_params = random_search.best_params_
-print(f'Best parameters found: {best_params}')
+best_params = search['params']
+print(f'Best parameters found: {best_params}（验证集 RMSE {search["rmse"]:.2f}，{search["rounds"]} 轮，'
+      f'搜索用时 {search["seconds"]:.1f} s）')
 
-# 创建DMatrix
-dtrain = xgb.DMatrix(X_train, label=y_train)
-dtest = xgb.DMatrix(X_test, label=y_test)
+# 创建DMatrix：hist 只需要分箱后的特征，QuantileDMatrix 直接分箱，不保存原始特征的副本；测试集沿用训练集的分箱
+dtrain = xgb.QuantileDMatrix(X_train, label=y_train, nthread=threads, enable_categorical=True)
+dtest = xgb.QuantileDMatrix(X_test, label=y_test, ref=dtrain, nthread=threads, enable_categorical=True)
 
 # 训练模型并捕获评估结果
 evals_result = {}
 final_model = xgb.train(
     params={**base_params, **best_params},
     dtrain=dtrain,
-    num_boost_round=200,
+    num_boost_round=max_rounds,
     evals=[(dtest, 'eval')],
     early_stopping_rounds=10,
     evals_result=evals_result
@@ -94,11 +97,13 @@ final_model = xgb.train(
 preds = final_model.predict(dtest)
 
 # 评估模型
-rmse = mean_squared_error(y_test, preds, squared=False)
+rmse = root_mean_squared_error(y_test, preds)
 print(f'Final RMSE: {rmse}')
 
-# 保存模型
-final_model.save_model('xgboost_gpu_model.json')
+# 保存模型包（booster + 城市词表 + 特征顺序，见 bundle.py），预测时不再需要训练数据
+bundle = ModelBundle(final_model, cities, features,
+                     training_metadata(device=device, rmse=float(rmse), best_params=best_params))
+print(f'模型包已保存到 {bundle.save()}')
 
 # 特征重要性图
 plt.figure(figsize=(10, 6))
@@ -0,0 +1,66 @@
+"""
+地区统计性能对比：原 fenxi.py 的多次 groupby + merge vs fenxi_agg.region_stats 一次扫描
+
+用法（在仓库根目录）: python -m benchmarks.bench_agg --rows 10000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synth import make_dataset
+from fenxi_agg import floor_share, floor_stats, floor_type_mapping, region_mapping, region_stats
+
+
+# 原 fenxi.py 中的统计，作为对照
+def groupby_chain(pandas_df):
+    pandas_df = pandas_df.copy()
+    pandas_df['地区'] = pandas_df['城市'].map(region_mapping).fillna('其他')
+    average_price_pd = pandas_df.groupby("地区")["月租"].mean().reset_index()
+    average_price_pd.columns = ["地区", "平均月租"]
+    median_price_pd = pandas_df.groupby("地区")["月租"].median().reset_index()
+    median_price_pd.columns = ["地区", "中位月租"]
+    average_area_pd = pandas_df.groupby("地区")["面积"].mean().reset_index()
+    average_area_pd.columns = ["地区", "平均面积"]
+    stddev_price_pd = pandas_df.groupby("地区")["月租"].std().reset_index()
+    stddev_price_pd.columns = ["地区", "月租标准差"]
+    pandas_df['楼层类型'] = pandas_df['楼层类型'].map(floor_type_mapping).fillna("高层")
+    average_floor_price_pd = pandas_df.groupby("楼层类型")["月租"].mean().reset_index()
+    floor_count_pd = pandas_df[pandas_df['楼层类型'].isin(["低层", "中层", "高层"])].groupby(["地区", "楼层类型"]).size().unstack(fill_value=0)
+    total_count_pd = floor_count_pd.sum(axis=1)
+    floor_count_percentage_pd = floor_count_pd.div(total_count_pd, axis=0).fillna(0)
+    combined_stats_pd = average_price_pd.merge(median_price_pd, on="地区").merge(stddev_price_pd, on="地区")
+    return combined_stats_pd.merge(average_area_pd, on="地区").set_index("地区"), average_floor_price_pd, floor_count_percentage_pd
+
+
+def single_pass(pandas_df):
+    stats = region_stats(pandas_df)
+    return stats, floor_stats(stats), floor_share(stats)
+
+
+def timed(name, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<16} {elapsed:>8.2f} s")
+    return result, elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    args = parser.parse_args()
+
+    df = make_dataset(args.rows)
+    # 原脚本读 CSV 得到的是普通字符串列
+    df_str = df.assign(城市=df['城市'].astype(str))
+    print(f"{len(df)} rows")
+    (expected, _, expected_share), old = timed('groupby + merge', lambda: groupby_chain(df_str))
+    (stats, _, share), new = timed('region_stats', lambda: single_pass(df))
+    print(f"speedup {old / new:.1f}x")
+
+    columns = ['平均月租', '中位月租', '月租标准差', '平均面积']
+    np.testing.assert_allclose(stats[columns].to_numpy(), expected[columns].to_numpy(), rtol=1e-4)
+    pd.testing.assert_frame_equal(share, expected_share[share.columns], check_names=False)
+    print('结果一致')
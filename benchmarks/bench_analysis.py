@@ -0,0 +1,174 @@
+"""
+分析流水线的规模基准：各后端（fenxi_backends）× 数据量
+
+每个 (后端, 行数) 组合在单独的子进程中运行一遍 fenxi.py 的流程，记录
+    总耗时，读取 / 聚合 / 出图 各阶段耗时，子进程峰值内存（ru_maxrss，内存映射读到的页也计入）
+出图 = report_tables + build_charts + 写出图表 HTML（fenxi_render.chart_html）；--png 时再用浏览器导出 PNG（需要 selenium）。
+没有安装的后端记为 unavailable，出错、超时或被杀掉（内存不足）的记为 error，其余组合照常运行。
+
+合成数据集（benchmarks.synth.write_dataset_file，分块写出）按行数缓存在 --data-dir，重复运行不再生成；
+文件名带有合成参数（城市占比、月租水平）的摘要，参数修改后自动重新生成。1 亿行约 1.1 GB。
+
+用法（在仓库根目录）:
+    python -m benchmarks.bench_analysis --sizes 10000 1000000 10000000 --engines pandas stream duckdb
+    python -m benchmarks.bench_analysis --output bench_analysis.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+default_sizes = [10_000, 1_000_000, 10_000_000, 100_000_000]
+
+
+def dataset_path(data_dir, rows, seed=0):
+    """行数为 rows 的合成数据集路径，不存在时生成"""
+    import hashlib
+
+    from benchmarks.synth import city_rent_level, city_weights, write_dataset_file
+
+    digest = hashlib.sha1(json.dumps([city_weights, city_rent_level, seed], ensure_ascii=False).encode()).hexdigest()
+    path = os.path.join(data_dir, f'rent_{rows}_{digest[:8]}.arrow')
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        start = time.perf_counter()
+        write_dataset_file(path, rows, seed)
+        print(f"生成 {path}（{time.perf_counter() - start:.1f} s）", file=sys.stderr)
+    return path
+
+
+def run_pipeline(engine, path, png=False):
+    """子进程中执行：统计、整理结果表、出图，返回各阶段耗时（秒）和峰值内存"""
+    from fenxi_backends import region_stats
+    from fenxi_charts import build_charts, report_tables
+    import fenxi_render
+
+    timings = {}
+    start = time.perf_counter()
+    stats, engine = region_stats(path, engine, timings=timings)
+    total_stats = time.perf_counter() - start
+    # 后端没有区分的部分（如启动开销）计入聚合
+    timings['aggregate'] = total_stats - timings.get('load', 0.0)
+
+    render_start = time.perf_counter()
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            charts = build_charts(report_tables(stats))
+            if png:
+                fenxi_render.render_charts(charts, force=True)
+            else:
+                os.makedirs(fenxi_render.cache_dir)
+                for chart, output_name in charts:
+                    fenxi_render.chart_html(chart, output_name)
+        finally:
+            os.chdir(cwd)
+    timings['render'] = time.perf_counter() - render_start
+    timings['total'] = time.perf_counter() - start
+    return {
+        'engine': engine,
+        'regions': len(stats),
+        'seconds': {name: round(value, 4) for name, value in timings.items()},
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def run_child(engine, path, rows, png, timeout):
+    """在子进程中跑一个组合，峰值内存不受之前组合的影响"""
+    result = {'engine': engine, 'rows': rows}
+    from fenxi_backends import available
+
+    if engine != 'auto' and not available(engine):
+        result['status'] = 'unavailable'
+        return result
+    command = [sys.executable, '-m', 'benchmarks.bench_analysis', '--child', engine, path]
+    if png:
+        command.append('--png')
+    try:
+        process = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        result.update(status='error', error=f'超时（{timeout} s）')
+        return result
+    if process.returncode != 0:
+        lines = process.stderr.strip().splitlines()
+        result.update(status='error', error=lines[-1] if lines else f'退出码 {process.returncode}')
+        return result
+    result.update(json.loads(process.stdout.strip().splitlines()[-1]), status='ok')
+    return result
+
+
+def machine_info():
+    from fenxi_backends import memory_bytes
+
+    import numpy
+    import pandas
+    import pyarrow
+
+    info = {
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'memory_gb': round(memory_bytes() / 2 ** 30, 1),
+        'pandas': pandas.__version__,
+        'numpy': numpy.__version__,
+        'pyarrow': pyarrow.__version__,
+    }
+    for module in ['duckdb', 'pyspark']:
+        try:
+            info[module] = __import__(module).__version__
+        except ImportError:
+            info[module] = None
+    return info
+
+
+def print_table(results):
+    print(f"{'rows':>11} {'engine':>8} {'status':>11} {'total s':>9} {'load s':>8} {'agg s':>8} "
+          f"{'render s':>9} {'peak MB':>9}")
+    for r in results:
+        s = r.get('seconds', {})
+        cells = [f"{s[name]:.3f}" if name in s else '-' for name in ['total', 'load', 'aggregate', 'render']]
+        print(f"{r['rows']:>11} {r['engine']:>8} {r['status']:>11} {cells[0]:>9} {cells[1]:>8} {cells[2]:>8} "
+              f"{cells[3]:>9} {r.get('peak_rss_mb', '-'):>9}")
+        if r['status'] == 'error':
+            print(f"{'':>11} {'':>8} {r['error']}")
+
+
+if __name__ == '__main__':
+    from fenxi_backends import engines
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=default_sizes, help='数据行数')
+    parser.add_argument('--engines', nargs='+', choices=['auto'] + engines, default=engines)
+    parser.add_argument('--data-dir', default='.bench_data', help='合成数据集的缓存目录')
+    parser.add_argument('--png', action='store_true', help='出图包括用浏览器导出 PNG（需要 selenium 和 Chrome）')
+    parser.add_argument('--timeout', type=float, default=3600, help='单个组合的超时（秒）')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    parser.add_argument('--output', default=None, help='同时把 JSON 结果写入文件')
+    parser.add_argument('--child', nargs=2, metavar=('ENGINE', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_pipeline(*args.child, png=args.png)))
+        sys.exit()
+
+    results = []
+    for rows in args.sizes:
+        path = dataset_path(args.data_dir, rows)
+        for engine in args.engines:
+            result = run_child(engine, path, rows, args.png, args.timeout)
+            results.append(result)
+            print(f"{rows} {engine}: {result['status']} {result.get('seconds', {}).get('total', '')}", file=sys.stderr)
+    report = {'machine': machine_info(), 'results': results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False))
+    else:
+        print_table(results)
@@ -0,0 +1,112 @@
+"""
+数据清洗性能对比：原来逐行 apply + re.search vs 向量化 str.extract
+
+从 zufanglist4.xlsx 中有放回抽样到指定行数（默认100万行），并混入无法解析的价格、缺失字段等情况。
+
+用法（在仓库根目录）: python -m benchmarks.bench_clean --rows 1000000
+"""
+import argparse
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+import shujuqingxi
+
+area_pattern = re.compile(r'(\d+(\.\d+)?)㎡')
+floor_number_pattern = re.compile(r'(\d+)层')
+floor_type_pattern = re.compile(r'([低中高])楼层')
+price_pattern = re.compile(r'(\d+)-(\d+)')
+
+
+# 原 shujuqingxi.py 中的逐行清洗，作为对照
+def extract_area(house_info):
+    match = re.search(area_pattern, house_info)
+    if match:
+        area = float(match.group(1))  # 转换为浮点数
+        return area
+    else:
+        return None
+
+
+def extract_floor_info(house_info):
+    floor_match = re.search(floor_number_pattern, house_info)
+    type_match = re.search(floor_type_pattern, house_info)
+
+    if floor_match:
+        floor_number = int(floor_match.group(1))  # 转换为整数
+    else:
+        floor_number = None
+
+    if type_match:
+        floor_type = type_match.group(1)
+        if floor_type == '高':
+            floor_type_value = 3
+        elif floor_type == '中':
+            floor_type_value = 2
+        elif floor_type == '低':
+            floor_type_value = 1
+        else:
+            floor_type_value = None
+    else:
+        floor_type_value = None
+
+    return floor_number, floor_type_value
+
+
+def extract_price(price_info):
+    match = re.search(price_pattern, price_info)
+    if match:
+        low_price = int(match.group(1))
+        high_price = int(match.group(2))
+        return (low_price + high_price) / 2
+    else:
+        try:
+            return float(price_info)
+        except ValueError:
+            return None
+
+
+def clean_apply(df):
+    df = df.copy()
+    df['面积'] = df['房屋信息'].apply(extract_area)
+    df[['楼层', '楼层类型']] = df['房屋信息'].apply(extract_floor_info).apply(pd.Series)
+    df['价格'] = df['价格'].apply(extract_price)
+    df['面积'] = df['面积'].fillna(0.0)
+    df['楼层类型'] = df['楼层类型'].fillna(2).astype(int)
+    df['价格'] = df['价格'].fillna(0.0)
+    return df[['省份', '城市', '面积', '楼层类型', '价格']]
+
+
+def make_raw(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    base = pd.read_excel('zufanglist4.xlsx')
+    df = base.iloc[rng.integers(0, len(base), rows)].reset_index(drop=True)
+    price = df['价格'].to_numpy(dtype=object)
+    price[rng.random(rows) < 0.002] = '面议'
+    df['价格'] = price
+    info = df['房屋信息'].to_numpy(dtype=object)
+    info[rng.random(rows) < 0.01] = '精装公寓,南'  # 没有面积和楼层
+    df['房屋信息'] = info
+    return df
+
+
+def timed(name, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"{name:<12} {time.perf_counter() - start:>8.2f} s")
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    df = make_raw(args.rows)
+    print(f"{len(df)} rows")
+    expected = timed('apply', lambda: clean_apply(df))
+    result = timed('vectorized', lambda: shujuqingxi.clean(df))
+    pd.testing.assert_frame_equal(result.reset_index(drop=True), expected.reset_index(drop=True))
+    print('结果一致')
@@ -0,0 +1,123 @@
+"""
+抓取吞吐量基准测试（不访问真实网站）
+
+为每个"城市"启动一个本地回放服务器（不同端口即不同主机，各自独立限速），
+用 pachong_async.crawl_async 抓取，报告 pages/s、rows/s、请求延迟 p50/p99 和峰值内存。
+pages/s 只计成功抓取并解析的页，失败的页（--error-rate）单独报告。
+
+用法（在仓库根目录）:
+    python -m benchmarks.bench_crawler --cities 14 --pages 6 --latency 0.2 --host-concurrency 2
+"""
+import argparse
+import asyncio
+import json
+import resource
+import sys
+import time
+
+import aiohttp
+
+from benchmarks.replay_server import start_server
+from pachong_async import crawl_async
+
+
+class CountingSink:
+    """只计数不落盘的 sink，排除磁盘写出对测量的影响；每个成功的页写一次"""
+
+    def __init__(self):
+        self.rows_written = 0
+        self.pages_written = 0
+
+    def write(self, rows):
+        self.rows_written += len(rows)
+        self.pages_written += 1
+
+
+def latency_trace(latencies):
+    trace = aiohttp.TraceConfig()
+
+    async def on_start(session, ctx, params):
+        ctx.start = time.perf_counter()
+
+    async def on_end(session, ctx, params):
+        latencies.append(time.perf_counter() - ctx.start)
+
+    trace.on_request_start.append(on_start)
+    trace.on_request_end.append(on_end)
+    trace.on_request_exception.append(on_end)
+    return trace
+
+
+def percentile(values, q):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def peak_rss_mb():
+    # Linux 下 ru_maxrss 单位为KB；子进程为解析进程池
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    self_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    child_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return self_rss, child_rss
+
+
+def run(args):
+    servers = [start_server(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                            items=args.items, record_dir=args.record_dir)
+               for _ in range(args.cities)]
+    tasks = [(f"http://127.0.0.1:{server.server_address[1]}/zufang/pg{{}}/", args.pages, f"城市{i}", f"省份{i}")
+             for i, server in enumerate(servers)]
+
+    latencies = []
+    sink = CountingSink()
+    start = time.perf_counter()
+    asyncio.run(crawl_async(tasks, {}, concurrency=args.host_concurrency, delay=(args.delay, args.delay),
+                            workers=args.workers, sink=sink, trace_configs=[latency_trace(latencies)]))
+    elapsed = time.perf_counter() - start
+    for server in servers:
+        server.shutdown()
+
+    self_rss, child_rss = peak_rss_mb()
+    pages = sink.pages_written
+    return {
+        'cities': args.cities,
+        'pages': pages,
+        'pages_failed': args.cities * args.pages - pages,
+        'rows': sink.rows_written,
+        'seconds': round(elapsed, 3),
+        'pages_per_s': round(pages / elapsed, 1),
+        'rows_per_s': round(sink.rows_written / elapsed, 1),
+        'latency_p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'latency_p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'peak_rss_mb': round(self_rss, 1),
+        'peak_rss_parser_mb': round(child_rss, 1),
+        'host_concurrency': args.host_concurrency,
+        'delay': args.delay,
+        'latency': args.latency,
+        'error_rate': args.error_rate,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cities', type=int, default=14)
+    parser.add_argument('--pages', type=int, default=6, help='每个城市的页数')
+    parser.add_argument('--items', type=int, default=30, help='每页房源数')
+    parser.add_argument('--latency', type=float, default=0.1, help='服务器平均响应延迟（秒）')
+    parser.add_argument('--jitter', type=float, default=0.05)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--record-dir', default=None, help='回放 pachong_cache 记录的页面代替合成页面')
+    parser.add_argument('--host-concurrency', type=int, default=1)
+    parser.add_argument('--delay', type=float, default=0.0, help='同一主机请求间隔（秒），真实抓取为10~15')
+    parser.add_argument('--workers', type=int, default=None, help='解析进程数')
+    parser.add_argument('--json', action='store_true', help='只输出一行JSON结果')
+    args = parser.parse_args()
+
+    result = run(args)
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False))
+    else:
+        for key, value in result.items():
+            print(f"{key:<20} {value}")
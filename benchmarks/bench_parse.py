@@ -0,0 +1,72 @@
+"""
+列表页解析性能对比：原 BeautifulSoup 解析 vs 预编译 XPath 解析（单进程 / 进程池）
+
+用法（在仓库根目录）: python -m benchmarks.bench_parse --pages 500 --workers 4
+"""
+import argparse
+import os
+import time
+
+from bs4 import BeautifulSoup
+
+from benchmarks.synth import make_page
+from pachong_parse import ParserPool, parse_page
+
+
+# 原 pachong.fetch_data 中的 BeautifulSoup 解析，作为对照
+def parse_page_bs(html, province, city):
+    rows = []
+    try:
+        bs = BeautifulSoup(html, 'lxml')
+        li_elements = bs.find_all("div", class_="content__list--item")
+        for li_element in li_elements:
+            item_locations = li_element.find('p', class_='content__list--item--des')
+            item_location = ''
+            if item_locations is not None:
+                item_locations = item_locations.find_all('a')
+                item_location = " - ".join([str(location.text.strip()) for location in item_locations])
+            item_houses = li_element.find('p', class_='content__list--item--des')
+            item_house = ",".join([str(house.text.strip()) for house in item_houses]).replace('\n', '').replace(' ', '').replace('-', '').replace(',/', '')
+            item_tags = li_element.find('p', class_='content__list--item--bottom oneline').find_all('i')
+            item_tag = ",".join([str(tag.text.strip()) for tag in item_tags])
+            item_brand = li_element.find('span', class_='brand')
+            if item_brand is not None:
+                item_brand = item_brand.text.strip()
+            item_date = li_element.find('span', class_='content__list--item--time oneline')
+            if item_date is not None:
+                item_date = item_date.text.strip()
+            item_price_content = li_element.find('span', class_='content__list--item-price').text.strip()
+            item_price = item_price_content.split(' ')[0]
+            item_unit = item_price_content.split(' ')[1]
+            rows.append([province, city,  item_location, item_house, item_brand, item_date, item_price, item_unit])
+    except Exception as e:
+        print(f"An error occurred: {e}")
+    return rows
+
+
+def timed(name, pages, func):
+    start = time.perf_counter()
+    results = func()
+    elapsed = time.perf_counter() - start
+    rows = sum(len(r) for r in results)
+    print(f"{name:<24} {len(pages) / elapsed:>10.1f} pages/s {rows / elapsed:>12.1f} rows/s")
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=300)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    pages = [(make_page(seed), '广东', '深圳') for seed in range(args.pages)]
+
+    expected = timed('BeautifulSoup', pages, lambda: [parse_page_bs(*p) for p in pages])
+    single = timed('XPath', pages, lambda: [parse_page(*p) for p in pages])
+    with ParserPool(args.workers) as pool:
+        pool.map(pages[:args.workers])  # 预热进程
+        pooled = timed(f'XPath x{args.workers} 进程', pages, lambda: list(pool.map(pages)))
+
+    assert single == expected, '解析结果与 BeautifulSoup 不一致'
+    assert pooled == expected, '进程池解析结果与 BeautifulSoup 不一致'
+    print('结果一致')
@@ -0,0 +1,232 @@
+"""
+统计查询服务（fenxi_server.py）和月租预测服务（XGBoost/serve.py）的压测
+
+不指定 --url 时在子进程中启动服务：统计服务用 benchmarks.synth 生成的 --rows 行合成数据集，
+预测服务用 --model 模型包。再用 --concurrency 个线程（各自一个 keep-alive 连接）发送随机查询，
+报告 QPS、延迟 p50/p90/p99 和缓存命中情况（预测服务另报告平均每批行数）。
+
+用法（在仓库根目录）:
+    python -m benchmarks.loadtest --rows 2000000 --concurrency 8 --duration 10
+    python -m benchmarks.loadtest --url http://127.0.0.1:8050 --json
+    python -m benchmarks.loadtest --service predict --concurrency 16 --queries 100000 --max-wait-ms 2
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import quote, urlsplit
+
+from benchmarks.synth import city_weights
+
+groupings = ['', '地区', '城市', '楼层类型', '地区,楼层类型', '城市,楼层类型']
+floors = ['低层', '中层', '高层']
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+server_script = os.path.join(root, 'fenxi_server.py')
+predict_script = os.path.join(root, 'XGBoost', 'serve.py')
+
+
+def percentile(values, q):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def make_queries(seed=0, count=200):
+    """随机组合分组维度、城市和楼层类型过滤，生成 count 个不同的查询路径"""
+    rng = random.Random(seed)
+    cities = list(city_weights)
+    queries = set()
+    while len(queries) < count:
+        params = []
+        by = rng.choice(groupings)
+        if by:
+            params.append(f'by={quote(by)}')
+        if rng.random() < 0.5:
+            params.append(f"{quote('城市')}={quote(','.join(sorted(rng.sample(cities, rng.randint(1, 4)))))}")
+        if rng.random() < 0.3:
+            params.append(f"{quote('楼层类型')}={quote(rng.choice(floors))}")
+        if rng.random() < 0.3:
+            params.append(f"stats={quote(','.join(rng.sample(['数量', '平均月租', '中位月租', '月租标准差'], 2)))}")
+        queries.add('/stats' + ('?' + '&'.join(params) if params else ''))
+    return sorted(queries)
+
+
+def make_predict_queries(cities, seed=0, count=200):
+    """随机城市、面积（两位小数）和楼层，生成 count 个不同的预测请求路径"""
+    rng = random.Random(seed)
+    queries = set()
+    while len(queries) < count:
+        queries.add(f"/predict?{quote('城市')}={quote(rng.choice(cities))}&{quote('面积')}="
+                    f"{rng.randint(1000, 30000) / 100}&{quote('楼层')}={rng.randint(1, 3)}")
+    return sorted(queries)
+
+
+def worker(host, port, queries, deadline, max_requests, latencies, errors, counter, lock, seed):
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    local_latencies = []
+    local_errors = 0
+    while time.perf_counter() < deadline:
+        with lock:
+            if max_requests and counter[0] >= max_requests:
+                break
+            counter[0] += 1
+        start = time.perf_counter()
+        try:
+            conn.request('GET', rng.choice(queries))
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                local_errors += 1
+        except (OSError, http.client.HTTPException):
+            local_errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=30)
+        local_latencies.append(time.perf_counter() - start)
+    conn.close()
+    with lock:
+        latencies.extend(local_latencies)
+        errors[0] += local_errors
+
+
+def get_json(host, port, path):
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    conn.request('GET', path)
+    body = conn.getresponse().read()
+    conn.close()
+    return json.loads(body)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_local_server(rows, cache_size):
+    """生成合成数据集并在子进程中启动统计服务，返回 (进程, 端口, 临时目录)"""
+    from benchmarks.synth import make_dataset
+    from dataset import write_dataset
+
+    tmp_dir = tempfile.TemporaryDirectory()
+    data_path = os.path.join(tmp_dir.name, 'data.arrow')
+    write_dataset(make_dataset(rows), data_path)
+    port = free_port()
+    process = subprocess.Popen([sys.executable, server_script, '--data', data_path, '--port', str(port),
+                                '--cache-size', str(cache_size)], stdout=subprocess.DEVNULL)
+    wait_ready(process, port)
+    return process, port, tmp_dir
+
+
+def start_predict_server(model, cache_size, max_wait_ms, max_batch):
+    """在子进程中启动预测服务，返回 (进程, 端口)"""
+    port = free_port()
+    process = subprocess.Popen([sys.executable, predict_script, '--model', os.path.abspath(model),
+                                '--port', str(port), '--cache-size', str(cache_size),
+                                '--max-wait-ms', str(max_wait_ms), '--max-batch', str(max_batch)],
+                               stdout=subprocess.DEVNULL)
+    wait_ready(process, port)
+    return process, port
+
+
+def wait_ready(process, port):
+    deadline = time.time() + 120
+    while True:
+        try:
+            get_json('127.0.0.1', port, '/health')
+            break
+        except OSError:
+            if process.poll() is not None or time.time() > deadline:
+                raise RuntimeError('查询服务启动失败')
+            time.sleep(0.2)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--service', choices=['stats', 'predict'], default='stats',
+                        help='stats 为统计查询服务，predict 为月租预测服务')
+    parser.add_argument('--url', default=None, help='已启动的服务地址；不指定时在本地启动')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='本地启动统计服务时合成数据集的行数')
+    parser.add_argument('--model', default=os.path.join(root, 'XGBoost', 'rent_model.json'),
+                        help='预测服务的模型包（本地启动时加载，查询的城市也取自其中）')
+    parser.add_argument('--max-wait-ms', type=float, default=2.0, help='本地启动预测服务时批次的最长等待时间')
+    parser.add_argument('--max-batch', type=int, default=256, help='本地启动预测服务时每批最多行数')
+    parser.add_argument('--cache-size', type=int, default=1024, help='本地启动时服务的缓存大小，0 表示不缓存')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0, help='压测时长（秒）')
+    parser.add_argument('--requests', type=int, default=0, help='总请求数上限，0 表示只按时长')
+    parser.add_argument('--queries', type=int, default=200, help='查询集合的大小')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    args = parser.parse_args()
+
+    process = tmp_dir = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+    elif args.service == 'predict':
+        process, port = start_predict_server(args.model, args.cache_size, args.max_wait_ms, args.max_batch)
+        host = '127.0.0.1'
+    else:
+        process, port, tmp_dir = start_local_server(args.rows, args.cache_size)
+        host = '127.0.0.1'
+    try:
+        if args.service == 'predict':
+            with open(args.model, encoding='utf-8') as f:
+                queries = make_predict_queries(json.load(f)['cities'], count=args.queries)
+        else:
+            queries = make_queries(count=args.queries)
+        before = get_json(host, port, '/health')
+        latencies, errors, counter, lock = [], [0], [0], threading.Lock()
+        start = time.perf_counter()
+        threads = [threading.Thread(target=worker, args=(host, port, queries, start + args.duration, args.requests,
+                                                         latencies, errors, counter, lock, i))
+                   for i in range(args.concurrency)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        after = get_json(host, port, '/health')
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+
+    hits = after['cache']['hits'] - before['cache']['hits']
+    misses = after['cache']['misses'] - before['cache']['misses']
+    result = {
+        'service': args.service,
+        'concurrency': args.concurrency,
+        'requests': len(latencies),
+        'errors': errors[0],
+        'seconds': round(elapsed, 3),
+        'qps': round(len(latencies) / elapsed, 1),
+        'latency_ms': {name: round(percentile(latencies, q) * 1000, 3)
+                       for name, q in [('p50', 0.5), ('p90', 0.9), ('p99', 0.99), ('max', 1.0)]},
+        'cache_hit_rate': round(hits / (hits + misses), 4) if hits + misses else None,
+    }
+    if args.service == 'predict':
+        batches = after['batches'] - before['batches']
+        result['mean_batch_rows'] = round(misses / batches, 2) if batches else None
+    else:
+        result['rows'] = after['rows']
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False))
+    else:
+        print(f"{result.get('rows', args.model)}: {args.concurrency} connections, {result['requests']} requests "
+              f"in {elapsed:.1f} s ({result['errors']} errors)")
+        print(f"QPS {result['qps']}")
+        print('latency ms ' + ' / '.join(f"{k} {v}" for k, v in result['latency_ms'].items()))
+        print(f"cache hit rate {result['cache_hit_rate']}")
+        if 'mean_batch_rows' in result:
+            print(f"mean batch rows {result['mean_batch_rows']}")
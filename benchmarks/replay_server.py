@@ -0,0 +1,113 @@
+"""
+离线回放服务器：代替 lianjia.com 提供 /zufang/pg{N}/ 列表页
+
+页面来源可以是抓取时记录的缓存（pachong_cache 的目录），也可以是 benchmarks.synth 生成的合成页面，
+标记结构与 pachong_parse 解析的一致。可配置响应延迟和错误率，用于CI和吞吐量测试。
+
+用法（在仓库根目录）:
+    python -m benchmarks.replay_server --port 8000 --latency 0.05 --error-rate 0.01
+    python -m benchmarks.replay_server --record-dir crawl_cache
+"""
+import argparse
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from benchmarks.synth import make_page
+
+page_pattern = re.compile(r'^/zufang/pg(\d+)/?$')
+
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, jitter=0.0, error_rate=0.0, items=30, record_dir=None):
+        super().__init__(address, ReplayHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.items = items
+        self.recorded = {}
+        if record_dir:
+            from pachong_cache import PageCache
+
+            cache = PageCache(record_dir)
+            for entry in cache.entries():
+                parts = urlsplit(entry['url'])
+                self.recorded[(parts.hostname, parts.path)] = cache.read(entry)
+        self.synthetic = {}
+        self.lock = threading.Lock()
+
+    def page(self, host, path, num):
+        if self.recorded:
+            # 回放时忽略端口，只按主机名和路径匹配；找不到同主机的就用任意主机的同一路径
+            html = self.recorded.get((host, path))
+            if html is None:
+                html = next((v for (h, p), v in self.recorded.items() if p == path), None)
+            return html
+        with self.lock:
+            key = (host, num)
+            if key not in self.synthetic:
+                self.synthetic[key] = make_page(zlib.crc32(f'{host}/{num}'.encode('utf-8')), self.items).encode('utf-8')
+            return self.synthetic[key]
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # 支持 keep-alive
+
+    def do_GET(self):
+        server = self.server
+        delay = server.latency + random.uniform(-server.jitter, server.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        path = urlsplit(self.path).path
+        match = page_pattern.match(path)
+        if random.random() < server.error_rate:
+            self.send_error(503, 'injected error')
+            return
+        if not match:
+            self.send_error(404)
+            return
+        host = (self.headers.get('Host') or '').split(':')[0]
+        body = server.page(host, path, int(match.group(1)))
+        if body is None:
+            self.send_error(404)
+            return
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(host='127.0.0.1', port=0, **kwargs):
+    """在后台线程启动回放服务器，返回 server（server.server_address 为实际地址）"""
+    server = ReplayServer((host, port), **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0.0, help='每个请求的平均延迟（秒）')
+    parser.add_argument('--jitter', type=float, default=0.0, help='延迟的随机波动范围（秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='返回503的比例')
+    parser.add_argument('--items', type=int, default=30, help='合成页面每页房源数')
+    parser.add_argument('--record-dir', default=None, help='回放 pachong_cache 记录的页面')
+    args = parser.parse_args()
+
+    server = ReplayServer((args.host, args.port), latency=args.latency, jitter=args.jitter,
+                          error_rate=args.error_rate, items=args.items, record_dir=args.record_dir)
+    print(f"Replay server listening on http://{args.host}:{args.port}/zufang/pg1/")
+    server.serve_forever()
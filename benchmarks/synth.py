@@ -0,0 +1,138 @@
+"""
+合成测试数据：与链家租房列表页相同结构的HTML页面
+
+不联网也能跑解析、抓取的基准测试。
+"""
+import random
+
+districts = ['罗湖', '福田', '南山', '宝安', '龙岗', '锦江', '青羊', '武侯', '高新', '天府新区']
+blocks = ['东门', '华强北', '科技园', '西乡', '布吉', '春熙路', '金沙', '桐梓林', '中和', '华阳']
+communities = ['阳光花园', '翠竹苑', '碧海湾', '金地名苑', '万科城', '保利香槟', '绿地世纪城', '中海国际']
+orientations = ['南', '北', '东', '西', '南北', '东南']
+layouts = ['1室0厅1卫', '1室1厅1卫', '2室1厅1卫', '3室2厅2卫', '4室2厅2卫']
+floors = ['低楼层', '中楼层', '高楼层']
+brands = ['链家', '自如', '贝壳优选', None]
+tags = ['近地铁', '精装', '随时看房', '押一付一', '双卫生间', '新上']
+dates = ['今天维护', '1天前维护', '7天前维护', '1个月前维护']
+
+
+def make_item(rng):
+    """生成一条房源卡片的HTML"""
+    area = rng.choice([f"{rng.randint(15, 200)}.00", str(rng.randint(15, 200)), f"{rng.uniform(15, 200):.2f}"])
+    low = rng.randint(8, 200) * 100
+    price = str(low) if rng.random() < 0.8 else f"{low}-{low + rng.randint(1, 10) * 100}"
+    community = rng.choice(communities)
+    if rng.random() < 0.85:
+        location = (f'<a target="_blank" href="/zufang/d/">{rng.choice(districts)}</a>-'
+                    f'<a href="/zufang/b/" target="_blank">{rng.choice(blocks)}</a>-'
+                    f'<a title="{community}" href="/zufang/c/" target="_blank">{community}</a>\n'
+                    f'          <i>/</i>\n')
+    else:
+        location = ''  # 品牌公寓没有位置链接
+    brand = rng.choice(brands)
+    brand_html = f'<span class="brand">\n            {brand}          </span>\n' if brand else ''
+    tag_html = ''.join(f'<i class="content__item__tag--x">{t}</i>\n' for t in rng.sample(tags, rng.randint(0, 3)))
+    return f'''<div class="content__list--item" data-house_code="SZ{rng.randint(10 ** 9, 10 ** 10)}">
+    <a class="content__list--item--aside" target="_blank" href="/zufang/x.html"><img alt="" src="x.jpg"></a>
+    <div class="content__list--item--main">
+      <p class="content__list--item--title">
+        <a class="twoline" target="_blank" href="/zufang/x.html">整租·{community} {rng.choice(layouts)} {rng.choice(orientations)}</a>
+      </p>
+      <p class="content__list--item--des">
+          {location}          {area}㎡
+          <i>/</i>{rng.choice(orientations)}        <i>/</i>
+          {rng.choice(layouts)}        <span class="hide">
+            <i>/</i>
+            {rng.choice(floors)}                        （{rng.randint(2, 40)}层）
+          </span>
+      </p>
+      <p class="content__list--item--bottom oneline">
+        {tag_html}
+      </p>
+      <p class="content__list--item--brand oneline">
+        {brand_html}<span class="content__list--item--time oneline">{rng.choice(dates)}</span>
+      </p>
+      <span class="content__list--item-price"><em>{price}</em> 元/月</span>
+    </div>
+  </div>
+'''
+
+
+def make_page(seed=0, items=30):
+    """生成一整页列表（默认每页30条，与链家一致）"""
+    rng = random.Random(seed)
+    body = ''.join(make_item(rng) for _ in range(items))
+    return f'''<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>租房</title></head>
+<body>
+<div class="content__list" id="content__list">
+  {body}
+</div>
+</body>
+</html>
+'''
+
+
+# 合成清洗后数据集（列同 dataset.py）。
+# 城市占比为 extracted_data.csv 中各城市的行数占比（value_counts(normalize=True)），
+# 月租水平为各城市每平米月租中位数除以 30（合成月租 = 面积 × 约 30 元/㎡ × 水平），同样取自 extracted_data.csv
+city_weights = {
+    '北京': 0.100, '上海': 0.100, '银川': 0.100, '武汉': 0.097, '昆明': 0.097, '天津': 0.096, '济南': 0.095,
+    '拉萨': 0.091, '贵阳': 0.070, '南京': 0.062, '呼和浩特': 0.056, '乌鲁木齐': 0.021, '重庆': 0.007, '海口': 0.007,
+}
+city_rent_level = {
+    '北京': 3.0, '上海': 3.1, '银川': 0.45, '武汉': 1.25, '昆明': 0.85, '天津': 1.2, '济南': 1.0,
+    '拉萨': 1.65, '贵阳': 0.7, '南京': 1.5, '呼和浩特': 0.6, '乌鲁木齐': 0.8, '重庆': 0.9, '海口': 1.0,
+}
+
+
+def make_dataset(rows, seed=0):
+    """生成 rows 行合成数据，返回 pandas DataFrame：城市（分类）、面积、楼层类型、月租"""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    cities = list(city_weights)
+    weights = np.array([city_weights[c] for c in cities])
+    codes = rng.choice(len(cities), size=rows, p=weights / weights.sum())
+    area = np.clip(rng.lognormal(4.4, 0.5, rows), 8, 600).astype(np.float32)
+    level = np.array([city_rent_level[c] for c in cities])[codes]
+    rent = np.clip(area * rng.lognormal(3.4, 0.45, rows) * level, 300, 150000).round().astype(np.float32)
+    floor = rng.choice(np.array([1, 2, 3], dtype=np.int8), size=rows, p=[0.28, 0.38, 0.34])
+    return pd.DataFrame({
+        '城市': pd.Categorical.from_codes(codes, categories=cities),
+        '面积': area,
+        '楼层类型': floor,
+        '月租': rent,
+    })
+
+
+def write_dataset_file(path, rows, seed=0, chunk_rows=5_000_000):
+    """
+    分块生成 rows 行合成数据，写成 dataset 格式的 Arrow 文件，内存只和 chunk_rows 有关（上亿行时用）。
+    各块共用同一个城市字典，Arrow IPC 文件格式要求字典在各批次间不变
+    """
+    import os
+
+    import numpy as np
+    import pyarrow as pa
+
+    from dataset import schema
+
+    cities = pa.array(list(city_weights))
+    no_provinces = pa.array([], pa.string())
+    tmp_path = path + '.tmp'
+    with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, schema) as writer:
+        for i, start in enumerate(range(0, rows, chunk_rows)):
+            df = make_dataset(min(chunk_rows, rows - start), seed=seed + i)
+            n = len(df)
+            writer.write_batch(pa.record_batch([
+                pa.DictionaryArray.from_arrays(pa.nulls(n, pa.int16()), no_provinces),
+                pa.DictionaryArray.from_arrays(pa.array(df['城市'].cat.codes.to_numpy().astype(np.int16)), cities),
+                pa.array(df['面积'].to_numpy()),
+                pa.array(df['楼层类型'].to_numpy()),
+                pa.array(df['月租'].to_numpy()),
+            ], schema=schema))
+    os.replace(tmp_path, path)
+    return path
@@ -0,0 +1,245 @@
+"""
+清洗后数据集的统一格式
+
+固定的列和类型，清洗、分析、训练共用一份文件:
+    省份      字典编码字符串
+    城市      字典编码字符串
+    面积      float32
+    楼层类型  int8   （1 低层 / 2 中层 / 3 高层）
+    月租      float32
+
+文件为不压缩的 Arrow IPC（.arrow），读取时直接内存映射，不需要解析。
+数据集也可以是由多个 .arrow 分片组成的目录（shujuqingxi.py --incremental 每次追加一个分片）。
+同时兼容旧的 CSV（价格/月租、房屋面积/面积、楼层/楼层类型 等不同列名）和
+shujuqingxi.py --chunked 写出的分区 parquet 目录，以及单个 .parquet 文件。
+
+用法:
+    from dataset import read_dataset, write_dataset
+    df = read_dataset('extracted_data.arrow')
+    for chunk in iter_chunks('extracted_data.arrow', 1000000): ...   # 分块读取，内存只与块大小有关
+    for batch in iter_batches('extracted_data.arrow', 1000000): ...  # 同上，Arrow RecordBatch
+    python dataset.py extracted_data.csv extracted_data.arrow   # 旧CSV转换为新格式
+"""
+import os
+
+import pyarrow as pa
+import pyarrow.ipc
+
+default_path = 'extracted_data.arrow'
+
+schema = pa.schema([
+    ('省份', pa.dictionary(pa.int16(), pa.string())),
+    ('城市', pa.dictionary(pa.int16(), pa.string())),
+    ('面积', pa.float32()),
+    ('楼层类型', pa.int8()),
+    ('月租', pa.float32()),
+])
+
+# 各脚本历史上使用过的列名
+legacy_names = {
+    '价格': '月租',
+    '房屋面积': '面积',
+    '楼层': '楼层类型',
+}
+
+
+def locate(*candidates):
+    """返回第一个存在的数据集路径，都不存在时返回第一个"""
+    for path in candidates:
+        if os.path.exists(path):
+            return path
+    return candidates[0]
+
+
+def to_table(data):
+    """把 DataFrame 或 Arrow 表整理成统一的列名和类型"""
+    if not isinstance(data, pa.Table):
+        data = pa.Table.from_pandas(data, preserve_index=False)
+    names = [name.lstrip('\ufeff') for name in data.column_names]
+    for old, new in legacy_names.items():
+        if old in names and new not in names:
+            names[names.index(old)] = new
+    data = data.rename_columns(names)
+
+    arrays = []
+    for field in schema:
+        if field.name in names:
+            column = data.column(field.name)
+            if pa.types.is_dictionary(field.type):
+                column = column.cast(pa.string()).dictionary_encode().cast(field.type)
+            else:
+                column = column.cast(field.type, safe=False)
+        else:
+            column = pa.nulls(data.num_rows, field.type)
+        arrays.append(column)
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def write_dataset(data, path=default_path):
+    """写出统一格式的数据集（不压缩的 Arrow IPC 文件，便于内存映射）"""
+    table = to_table(data).combine_chunks()
+    tmp_path = path + '.tmp'
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _read_ipc(path):
+    source = pa.memory_map(path, 'r')
+    return pa.ipc.open_file(source).read_all()
+
+
+def read_table(path=default_path, columns=None):
+    """
+    读取为 Arrow 表。.arrow 文件及 .arrow 分片目录内存映射读取；
+    其它目录按分区 parquet 读取；.csv 按旧格式解析
+    """
+    if os.path.isdir(path):
+        parts = sorted(name for name in os.listdir(path) if name.endswith('.arrow'))
+        if parts:
+            table = pa.concat_tables([_read_ipc(os.path.join(path, name)) for name in parts],
+                                     promote_options='permissive')
+        else:
+            import pyarrow.dataset as ds
+
+            table = to_table(ds.dataset(path, format='parquet', partitioning='hive').to_table())
+    elif path.endswith('.csv'):
+        import pandas as pd
+
+        table = to_table(pd.read_csv(path, encoding='utf-8-sig'))
+    elif path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        table = to_table(pq.read_table(path))
+    else:
+        table = _read_ipc(path)
+    if columns is not None:
+        table = table.select(columns)
+    return table
+
+
+def read_dataset(path=default_path, columns=None, categories=True):
+    """读取为 pandas DataFrame。categories=False 时 省份/城市 转为普通字符串列"""
+    table = read_table(path, columns)
+    if not categories:
+        for i, field in enumerate(table.schema):
+            if pa.types.is_dictionary(field.type):
+                table = table.set_column(i, field.name, table.column(i).cast(pa.string()))
+    return table.to_pandas(split_blocks=True)
+
+
+def count_rows(path=default_path):
+    """数据集行数，只读元数据；CSV 按前 1MB 的平均行长估算"""
+    if os.path.isdir(path):
+        parts = sorted(name for name in os.listdir(path) if name.endswith('.arrow'))
+        if parts:
+            return sum(count_rows(os.path.join(path, name)) for name in parts)
+        import pyarrow.dataset as ds
+
+        return ds.dataset(path, format='parquet', partitioning='hive').count_rows()
+    if path.endswith('.csv'):
+        with open(path, 'rb') as f:
+            head = f.read(1 << 20)
+        return int(os.path.getsize(path) / max(len(head), 1) * max(head.count(b'\n') - 1, 1))
+    reader = pa.ipc.open_file(pa.memory_map(path, 'r'))
+    return sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+
+
+def iter_batches(path=default_path, batch_rows=1000000, columns=None):
+    """分块读取为统一格式的 Arrow RecordBatch，每块不超过 batch_rows 行，支持的格式同 read_table"""
+    if os.path.isdir(path):
+        parts = sorted(name for name in os.listdir(path) if name.endswith('.arrow'))
+        if parts:
+            for name in parts:
+                yield from iter_batches(os.path.join(path, name), batch_rows, columns)
+        else:
+            import pyarrow.dataset as ds
+
+            for batch in ds.dataset(path, format='parquet', partitioning='hive').to_batches(batch_size=batch_rows):
+                yield from to_table(pa.Table.from_batches([batch])).select(columns or schema.names).to_batches()
+    elif path.endswith('.csv'):
+        import pandas as pd
+
+        for chunk in pd.read_csv(path, encoding='utf-8-sig', chunksize=batch_rows):
+            yield from to_table(chunk).select(columns or schema.names).to_batches()
+    elif path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_rows):
+            yield from to_table(pa.Table.from_batches([batch])).select(columns or schema.names).to_batches()
+    else:
+        reader = pa.ipc.open_file(pa.memory_map(path, 'r'))
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i)
+            if columns is not None:
+                batch = batch.select(columns)
+            # 内存映射的切片不复制数据
+            for offset in range(0, batch.num_rows, batch_rows):
+                yield batch.slice(offset, batch_rows)
+
+
+def iter_chunks(path=default_path, chunk_rows=1000000, columns=None):
+    """分块读取为 pandas DataFrame，每块不超过 chunk_rows 行，支持的格式同 read_table"""
+    for batch in iter_batches(path, chunk_rows, columns):
+        if batch.num_rows:
+            yield batch.to_pandas(split_blocks=True)
+
+
+def unquote_partitions(out_dir):
+    """
+    pyarrow 写分区目录时把中文做 URL 编码（城市=%E5%8C%97...），Spark 读取时不会按 UTF-8 解码。
+    这里把目录名还原为 城市=北京；同名目录已存在时把文件移进去
+    """
+    from urllib.parse import unquote
+
+    for root, dirs, _ in os.walk(out_dir, topdown=False):
+        for name in dirs:
+            plain = unquote(name)
+            if plain == name:
+                continue
+            source, target = os.path.join(root, name), os.path.join(root, plain)
+            if os.path.exists(target):
+                for entry in os.listdir(source):
+                    os.replace(os.path.join(source, entry), os.path.join(target, entry))
+                os.rmdir(source)
+            else:
+                os.replace(source, target)
+
+
+def write_partitioned(path, out_dir, partition_by=('城市',), batch_rows=1000000):
+    """把数据集分块转换为按 partition_by 分区的 parquet 目录（城市=北京/part-0.parquet），供 Spark 等引擎直接并行读取"""
+    import shutil
+
+    import pyarrow.dataset as ds
+
+    # 分区列写在目录名里，统一用普通字符串
+    target = pa.schema([(field.name, pa.string() if pa.types.is_dictionary(field.type) else field.type)
+                        for field in schema])
+
+    def batches():
+        for batch in iter_batches(path, batch_rows):
+            yield pa.RecordBatch.from_arrays([column.cast(field.type) for column, field in zip(batch.columns, target)],
+                                             schema=target)
+
+    tmp_dir = out_dir.rstrip('/\\') + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    ds.write_dataset(pa.RecordBatchReader.from_batches(target, batches()), tmp_dir, format='parquet',
+                     partitioning=list(partition_by), partitioning_flavor='hive',
+                     existing_data_behavior='overwrite_or_ignore',
+                     file_options=ds.ParquetFileFormat().make_write_options(compression='zstd'))
+    unquote_partitions(tmp_dir)
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    return out_dir
+
+
+if __name__ == '__main__':
+    import sys
+
+    if len(sys.argv) != 3:
+        print('用法: python dataset.py 输入(.csv/.arrow/分区目录) 输出.arrow')
+        sys.exit(1)
+    write_dataset(read_table(sys.argv[1]), sys.argv[2])
+    print(f"数据已保存到 {sys.argv[2]}")
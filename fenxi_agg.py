@@ -0,0 +1,178 @@
+"""
+地区 / 楼层类型统计
+
+一次扫描算出各地区的数量、平均月租、中位月租、月租标准差、平均面积和各楼层类型的数量、占比，
+结果放在一张以地区为索引的表里，所有图表和打印都从这张表读取。
+分组用整数编码（城市编码 -> 地区编码，楼层类型 -> 0/1/2），统计用 numpy.bincount，
+不再做多次 groupby 和 merge。
+
+    stats = region_stats(df)      # df 至少包含 城市、面积、楼层类型、月租
+    floor = floor_stats(stats)    # 各楼层类型的数量和平均月租
+"""
+import numpy as np
+import pandas as pd
+
+# 定义城市和地区映射
+region_mapping = {
+    "北京": "华北",
+    "天津": "华北",
+    "石家庄": "华北",
+    "太原": "华北",
+    "济南": "华北",
+    "郑州": "华北",
+    "沈阳": "东北",
+    "长春": "东北",
+    "哈尔滨": "东北",
+    "西安": "西北",
+    "兰州": "西北",
+    "西宁": "西北",
+    "乌鲁木齐": "西北",
+    "成都": "西南",
+    "贵阳": "西南",
+    "昆明": "西南",
+    "重庆": "西南",
+    "广州": "华南",
+    "海口": "华南",
+    "南宁": "华南",
+    "拉萨": "西南",
+    "南京": "华东",
+    "杭州": "华东",
+    "合肥": "华东",
+    "上海": "华东",
+    "南昌": "华东",
+    "福州": "东南",
+    "武汉": "华中",
+    "长沙": "华中",
+    "银川": "西北",
+    "呼和浩特": "华北",
+}
+other_region = '其他'
+
+# 楼层类型映射，1/2/3 以外的值按高层处理
+floor_type_mapping = {1: "低层", 2: "中层", 3: "高层"}
+floor_types = ["低层", "中层", "高层"]
+
+# 结果表的列
+# 各楼层类型的月租合计、月租数量用于汇总楼层类型的平均月租（见 floor_stats）
+stat_columns = ['数量', '平均月租', '中位月租', '月租标准差', '平均面积'] + \
+    [f'{t}数量' for t in floor_types] + [f'{t}占比' for t in floor_types] + \
+    [f'{t}{c}' for t in floor_types for c in ('月租合计', '月租数量')]
+
+
+def region_codes(cities):
+    """城市列 -> (地区编码数组, 按名称排序的地区列表)；城市为空的行归入"其他"，列表中可能有没有数据的地区"""
+    city_codes, city_names = pd.factorize(cities)
+    # 最后一项对应编码 -1（城市为空）
+    names = np.array([region_mapping.get(c, other_region) for c in city_names] + [other_region], dtype=object)
+    regions, lookup = np.unique(names, return_inverse=True)
+    return lookup[city_codes].astype(np.intp), list(regions)
+
+
+def floor_codes(floor_type):
+    """楼层类型 1/2/3 -> 0/1/2，其它值（含缺失）-> 2（高层）"""
+    values = np.asarray(floor_type)
+    if not np.issubdtype(values.dtype, np.number):
+        values = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=float)
+    codes = np.full(len(values), 2, dtype=np.intp)
+    codes[values == 1] = 0
+    codes[values == 2] = 1
+    return codes
+
+
+def group_medians(codes, values, num_groups):
+    """各组的精确中位数（与 pandas 一致，偶数个时取中间两个的平均），忽略缺失值"""
+    valid = ~np.isnan(values)
+    codes, values = codes[valid], values[valid]
+    # 组数不多时用 int16 编码排序，numpy 对小整数的稳定排序是基数排序
+    order = np.argsort(codes.astype(np.int16) if num_groups < 2 ** 15 else codes, kind='stable')
+    sorted_values = values[order]
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=num_groups))])
+    medians = np.full(num_groups, np.nan)
+    for g in range(num_groups):
+        part = sorted_values[bounds[g]:bounds[g + 1]]
+        n = len(part)
+        if n == 0:
+            continue
+        mid = n // 2
+        if n % 2:
+            medians[g] = np.partition(part, mid)[mid]
+        else:
+            part = np.partition(part, [mid - 1, mid])
+            medians[g] = (part[mid - 1] + part[mid]) / 2
+    return medians
+
+
+def _weighted_bincount(codes, values, size):
+    valid = ~np.isnan(values)
+    counts = np.bincount(codes[valid], minlength=size).astype(float)
+    sums = np.bincount(codes[valid], weights=values[valid], minlength=size)
+    return valid, counts, sums
+
+
+def region_stats(df):
+    """
+    返回以地区为索引（按名称排序）的统计表，列见 stat_columns。
+    月租、面积的缺失值在对应统计中忽略；楼层数量和占比按行计数。
+    """
+    codes, regions = region_codes(df['城市'])
+    num_regions = len(regions)
+    floor = floor_codes(df['楼层类型'])
+    rent = df['月租'].to_numpy(dtype=float)
+    area = df['面积'].to_numpy(dtype=float)
+
+    # 地区 × 楼层类型 的组合编码，一次 bincount 同时得到两个维度
+    cell = codes * 3 + floor
+    size = num_regions * 3
+    rows = np.bincount(cell, minlength=size).reshape(num_regions, 3)
+    valid, rent_counts, rent_sums = _weighted_bincount(cell, rent, size)
+    # 平方和先减去全局均值，避免大数相减损失精度
+    shift = rent[valid].mean() if valid.any() else 0.0
+    shifted = rent[valid] - shift
+    rent_sq = np.bincount(cell[valid], weights=shifted * shifted, minlength=size)
+    _, area_counts, area_sums = _weighted_bincount(codes, area, num_regions)
+
+    rent_counts = rent_counts.reshape(num_regions, 3)
+    rent_sums = rent_sums.reshape(num_regions, 3)
+    n = rent_counts.sum(axis=1)
+    total = rent_sums.sum(axis=1)
+    sq = rent_sq.reshape(num_regions, 3).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / n
+        # 样本方差（ddof=1），与 pandas 的 std 一致
+        var = (sq - n * (mean - shift) ** 2) / (n - 1)
+        std = np.sqrt(np.clip(var, 0, None))
+        floor_share = rows / rows.sum(axis=1, keepdims=True)
+
+    stats = pd.DataFrame({
+        '数量': rows.sum(axis=1),
+        '平均月租': mean,
+        '中位月租': group_medians(codes, rent, num_regions),
+        '月租标准差': np.where(n > 1, std, np.nan),
+        '平均面积': np.divide(area_sums, area_counts, out=np.full(num_regions, np.nan), where=area_counts > 0),
+    }, index=pd.Index(regions, name='地区'))
+    for i, t in enumerate(floor_types):
+        stats[f'{t}数量'] = rows[:, i]
+    for i, t in enumerate(floor_types):
+        stats[f'{t}占比'] = np.nan_to_num(floor_share[:, i])
+    for i, t in enumerate(floor_types):
+        stats[f'{t}月租合计'] = rent_sums[:, i]
+        stats[f'{t}月租数量'] = rent_counts[:, i]
+    return stats[stats['数量'] > 0]
+
+
+def floor_stats(stats):
+    """从地区统计表汇总各楼层类型的数量和平均月租"""
+    counts = [stats[f'{t}数量'].sum() for t in floor_types]
+    rent_counts = np.array([stats[f'{t}月租数量'].sum() for t in floor_types])
+    sums = np.array([stats[f'{t}月租合计'].sum() for t in floor_types])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = sums / rent_counts
+    result = pd.DataFrame({'楼层类型': floor_types, '数量': counts, '平均月租': means})
+    return result[result['数量'] > 0].reset_index(drop=True)
+
+
+def floor_share(stats):
+    """各地区低层、中层、高层的占比表（地区 × 楼层类型）"""
+    share = stats[[f'{t}占比' for t in floor_types]]
+    share.columns = pd.Index(floor_types, name='楼层类型')
+    return share
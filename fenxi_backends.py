@@ -0,0 +1,237 @@
+"""
+分析后端
+
+各地区的统计口径只在 region_spec 中定义一次，每个后端把它翻译成自己的计算方式，结果都是
+fenxi_agg.region_stats 格式的统计表（以地区为索引，列为 stat_columns），图表和打印与后端无关。
+
+    pandas   整表读入内存，fenxi_agg 一次扫描（几百万行以内最快，没有启动开销）
+    stream   分块扫描，只保留可合并的状态（fenxi_stream，内存与行数无关，中位月租为近似值）
+    duckdb   进程内列式引擎，多线程、可溢出到磁盘（千万到上亿行）
+    spark    Spark 直接读取文件（集群或数据远大于单机时）
+    auto     按数据行数、内存和CPU核数选择
+
+    stats, engine = region_stats(path, engine='auto')
+
+传入 timings（dict）时各后端把 读取(load)、聚合(aggregate) 的耗时累加进去，供 benchmarks/bench_analysis.py 使用。
+"""
+import contextlib
+import os
+import time
+
+
+from dataset import count_rows, legacy_names, read_table, write_partitioned
+from fenxi_agg import floor_types, other_region, region_mapping, stat_columns
+
+engines = ['pandas', 'stream', 'duckdb', 'spark']
+
+# 统计口径：(结果列, 聚合, 列, 楼层类型)
+# 聚合为 count（列为 None 时数行数，否则数非空值）/ sum / mean / median / std（样本标准差，ddof=1）；
+# 楼层类型不为 None 时只统计该楼层类型的行（楼层类型 1 低层、2 中层，其它值和缺失按高层）。
+# 各楼层类型的占比由数量推出（见 finish）。
+region_spec = [
+    ('数量', 'count', None, None),
+    ('平均月租', 'mean', '月租', None),
+    ('中位月租', 'median', '月租', None),
+    ('月租标准差', 'std', '月租', None),
+    ('平均面积', 'mean', '面积', None),
+] + [(f'{t}{name}', func, column, t) for t in floor_types
+     for name, func, column in [('数量', 'count', None), ('月租合计', 'sum', '月租'), ('月租数量', 'count', '月租')]]
+
+
+@contextlib.contextmanager
+def phase(timings, name):
+    """把代码块的耗时累加到 timings[name]（timings 为 None 时不记录）"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+
+def finish(stats):
+    """后端算出的 region_spec 各列 -> region_stats 格式：按地区名排序，补上各楼层类型的占比"""
+    stats = stats.sort_index()
+    stats.index.name = '地区'
+    counts = ['数量'] + [f'{t}数量' for t in floor_types]
+    stats[counts] = stats[counts].fillna(0).astype('int64')
+    for t in floor_types:
+        stats[f'{t}占比'] = stats[f'{t}数量'] / stats['数量']
+    stats = stats[stat_columns]
+    values = [name for name in stat_columns if name not in counts]
+    stats[values] = stats[values].astype(float).fillna({f'{t}月租合计': 0.0 for t in floor_types})
+    return stats
+
+
+def pandas_stats(path, timings=None, **options):
+    from fenxi_agg import region_stats
+
+    with phase(timings, 'load'):
+        df = read_table(path, ['城市', '面积', '楼层类型', '月租']).to_pandas(split_blocks=True)
+    with phase(timings, 'aggregate'):
+        # fenxi_agg.region_stats 直接按 region_spec 的口径实现（整数编码 + bincount）
+        return region_stats(df)
+
+
+def stream_stats(path, chunk_rows=1000000, median_error=0.005, timings=None, **options):
+    from fenxi_stream import stream_stats
+
+    return stream_stats(path, chunk_rows, median_error, timings)
+
+
+def duckdb_stats(path, threads=None, timings=None, **options):
+    import duckdb
+
+    aggregates = {'count': 'count', 'sum': 'sum', 'mean': 'avg', 'median': 'median', 'std': 'stddev_samp'}
+    selects = []
+    for name, func, column, floor in region_spec:
+        expr = f'{aggregates[func]}({column or "*"})'
+        if floor is not None:
+            expr += f" FILTER (WHERE 楼层 = '{floor}')"
+        selects.append(f'{expr} AS "{name}"')
+    region_case = 'CASE 城市 ' + ' '.join(f"WHEN '{city}' THEN '{region}'" for city, region in
+                                           region_mapping.items()) + f" ELSE '{other_region}' END"
+    floor_case = "CASE 楼层类型 WHEN 1 THEN '低层' WHEN 2 THEN '中层' ELSE '高层' END"
+
+    with phase(timings, 'load'):
+        con = duckdb.connect()
+        if threads:
+            con.execute(f'SET threads TO {int(threads)}')
+        if os.path.isdir(path) and not any(name.endswith('.arrow') for name in os.listdir(path)):
+            # 分区 parquet 目录由 DuckDB 直接并行读取（读取计入聚合时间）
+            source = f"read_parquet('{os.path.join(path, '**', '*.parquet')}', hive_partitioning = true)"
+        else:
+            # Arrow 数据集内存映射后交给 DuckDB 扫描，不复制；CSV 按 dataset 的规则解析旧列名
+            con.register('rent_data', read_table(path, ['城市', '面积', '楼层类型', '月租']))
+            source = 'rent_data'
+    sql = f'''
+        SELECT {region_case} AS 地区, {', '.join(selects)}
+        FROM (SELECT *, {floor_case} AS 楼层 FROM {source})
+        GROUP BY 1
+    '''
+    with phase(timings, 'aggregate'):
+        return finish(con.execute(sql).df().set_index('地区'))
+
+
+spark_parquet_fields = [('省份', 'string'), ('面积', 'float'), ('楼层类型', 'byte'), ('月租', 'float'),
+                        ('城市', 'string')]
+spark_csv_types = {'省份': 'string', '城市': 'string', '面积': 'double', '楼层类型': 'int', '月租': 'double'}
+
+
+def spark_source(path):
+    """
+    Spark 能直接读取的路径。parquet 目录和 CSV 原样返回；
+    Arrow 数据集（Spark 不能直接读）分块转换为旁边按城市分区的 parquet 目录，源数据更新后重新转换
+    """
+    if path.endswith('.csv'):
+        return path
+    if os.path.isdir(path) and not any(name.endswith('.arrow') for name in os.listdir(path)):
+        return path
+    out_dir = os.path.splitext(path.rstrip('/\\'))[0] + '_by_city'
+    if os.path.isdir(path):
+        modified = max(os.path.getmtime(os.path.join(path, name)) for name in os.listdir(path))
+    else:
+        modified = os.path.getmtime(path)
+    if not os.path.exists(out_dir) or os.path.getmtime(out_dir) < modified:
+        print(f"转换 {path} -> {out_dir}")
+        write_partitioned(path, out_dir)
+    return out_dir
+
+
+def spark_stats(path, master='local[*]', timings=None, **options):
+    from pyspark.sql import SparkSession
+    from pyspark.sql.functions import avg, coalesce, col, count, create_map, lit, median, stddev, sum as spark_sum, when
+
+    # 创建SparkSession；toPandas 通过 Arrow 批量传输。JVM 启动计入读取时间
+    with phase(timings, 'load'):
+        spark = SparkSession.builder \
+            .appName("rent_analyse") \
+            .master(master) \
+            .config("spark.sql.execution.arrow.pyspark.enabled", "true") \
+            .config("spark.sql.execution.arrow.pyspark.fallback.enabled", "true") \
+            .getOrCreate()
+    try:
+        # 由 Spark 直接并行读取文件，不经过 driver 上的 pandas（读取是惰性的，实际读取计入聚合时间）
+        with phase(timings, 'load'):
+            source = spark_source(path)
+            if source.endswith('.csv'):
+                # 按 CSV 表头（兼容旧列名）给出显式 schema，不用 inferSchema 多扫一遍文件
+                with open(source, encoding='utf-8-sig') as f:
+                    names = [legacy_names.get(name, name) for name in f.readline().strip().split(',')]
+                schema = ', '.join(f'`{name}` {spark_csv_types.get(name, "string")}' for name in names)
+                df = spark.read.csv(source, header=True, schema=schema)
+            else:
+                df = spark.read.schema(', '.join(f'`{n}` {t}' for n, t in spark_parquet_fields)).parquet(source)
+
+        # 城市 -> 地区 用 create_map 字面量映射，在 JVM 中计算，不经过 Python worker，也不需要 join
+        region_map = create_map([lit(x) for pair in region_mapping.items() for x in pair])
+        floor_expr = when(col("楼层类型") == 1, "低层").when(col("楼层类型") == 2, "中层").otherwise("高层")
+        df_with_region = df.select(coalesce(region_map[col("城市")], lit(other_region)).alias("地区"),
+                                   floor_expr.alias("楼层"), "面积", "月租")
+
+        # 一个 groupBy 算出 region_spec 的全部列，楼层类型用条件聚合，只 collect 一次。
+        # 整个分析只有这一个 action，df_with_region 只被计算一次，所以不 cache（cache 只会多占一份执行内存）
+        aggregates = {'count': count, 'sum': spark_sum, 'mean': avg, 'median': median, 'std': stddev}
+        columns = []
+        for name, func, column, floor in region_spec:
+            value = col(column) if column else lit(1)
+            if floor is not None:
+                value = when(col("楼层") == floor, value)
+            columns.append(aggregates[func](value).alias(name))
+        with phase(timings, 'aggregate'):
+            stats = df_with_region.groupBy("地区").agg(*columns).toPandas()
+    finally:
+        spark.stop()
+    return finish(stats.set_index('地区'))
+
+
+def available(engine):
+    module = {'duckdb': 'duckdb', 'spark': 'pyspark'}.get(engine)
+    if module is None:
+        return True
+    import importlib.util
+
+    return importlib.util.find_spec(module) is not None
+
+
+def memory_bytes():
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (ValueError, OSError, AttributeError):
+        return 8 << 30
+
+
+def choose_engine(path, cores=None, memory=None):
+    """
+    auto 模式：
+    - 200 万行以内用 pandas（fenxi_agg 一次扫描不到一秒，其它引擎的启动和转换开销更大）
+    - 整表放不进一半内存（约 40 字节/行）时，8 核以上且装了 pyspark 用 spark，否则 duckdb（可溢出到磁盘），再否则 stream
+    - 4 核以上用 duckdb（多线程扫描）；核数少时 DuckDB 并不比 fenxi_agg 快，用 pandas
+    """
+    rows = count_rows(path)
+    cores = cores or os.cpu_count() or 1
+    memory = memory or memory_bytes()
+    if rows <= 2000000:
+        return 'pandas'
+    if rows * 40 > memory / 2:
+        if cores >= 8 and available('spark'):
+            return 'spark'
+        return 'duckdb' if available('duckdb') else 'stream'
+    if cores >= 4 and available('duckdb'):
+        return 'duckdb'
+    return 'pandas'
+
+
+backends = {
+    'pandas': pandas_stats,
+    'stream': stream_stats,
+    'duckdb': duckdb_stats,
+    'spark': spark_stats,
+}
+
+
+def region_stats(path, engine='auto', timings=None, **options):
+    """用指定后端计算 path 的地区统计表，返回 (统计表, 实际使用的后端)"""
+    if engine == 'auto':
+        engine = choose_engine(path)
+    return backends[engine](path, timings=timings, **options), engine
@@ -0,0 +1,155 @@
+"""
+分析报告的结果表和图表
+
+report_tables 从地区统计表（fenxi_agg.region_stats 格式，任一后端的输出都可以）整理出打印和画图用的各张表，
+build_charts 用这些表生成 pyecharts 图表，返回 [(图表, 输出PNG文件名), ...]，交给 fenxi_render.render_charts 导出。
+"""
+from pyecharts.charts import Bar, Boxplot, Line, HeatMap, Funnel
+from pyecharts import options as opts
+
+from fenxi_agg import floor_share, floor_stats
+
+
+def report_tables(stats):
+    """各地区平均月租、中位月租、平均面积、月租标准差，各楼层平均月租，楼层占比和综合统计（数值取整）"""
+
+    # 从统计表中取出各项结果，并对数值进行取整
+    def stat_column(name):
+        return stats[name].round().astype(int).reset_index()
+
+    # 各楼层类型的平均月租
+    average_floor_price_pd = floor_stats(stats)[["楼层类型", "平均月租"]]
+    average_floor_price_pd["平均月租"] = average_floor_price_pd["平均月租"].round().astype(int)
+    return {
+        "平均月租": stat_column("平均月租"),
+        "中位月租": stat_column("中位月租"),
+        "平均面积": stat_column("平均面积"),
+        "月租标准差": stat_column("月租标准差"),
+        "楼层平均月租": average_floor_price_pd,
+        # 各地区1、2、3楼层房数量的占比
+        "楼层占比": floor_share(stats),
+        # 中位数、平均数和标准差的综合统计
+        "综合统计": stats[["平均月租", "中位月租", "月租标准差"]].round().astype(int).reset_index(),
+    }
+
+
+def build_charts(tables):
+    """生成全部图表，返回 [(图表, 输出PNG文件名), ...]"""
+    average_price_pd = tables["平均月租"]
+    median_price_pd = tables["中位月租"]
+    average_area_pd = tables["平均面积"]
+    average_floor_price_pd = tables["楼层平均月租"]
+    floor_count_percentage_pd = tables["楼层占比"]
+    combined_stats_pd = tables["综合统计"]
+
+    # 各地区房价平均月租柱状图
+    bar_avg_price = (
+        Bar(init_opts=opts.InitOpts(theme='light'))
+        .add_xaxis(average_price_pd["地区"].tolist())
+        .add_yaxis("平均月租", average_price_pd["平均月租"].tolist(), 
+                   label_opts=opts.LabelOpts(is_show=True, formatter="{c}"),
+                   itemstyle_opts=opts.ItemStyleOpts(color="#FF9999"))  # 设置颜色
+        .set_global_opts(
+            title_opts=opts.TitleOpts(title="各地区房价平均月租"),
+            xaxis_opts=opts.AxisOpts(axislabel_opts=opts.LabelOpts(rotate=45)),
+            yaxis_opts=opts.AxisOpts(name="月租"),
+        )
+    )
+
+    # 各地区平均面积柱状图
+    bar_avg_area = (
+        Bar(init_opts=opts.InitOpts(theme='light'))
+        .add_xaxis(average_area_pd["地区"].tolist())
+        .add_yaxis("平均面积", average_area_pd["平均面积"].tolist(), 
+                   label_opts=opts.LabelOpts(is_show=True, formatter="{c}"),
+                   itemstyle_opts=opts.ItemStyleOpts(color="#99CCFF"))  # 设置颜色
+        .set_global_opts(
+            title_opts=opts.TitleOpts(title="各地区平均面积"),
+            xaxis_opts=opts.AxisOpts(axislabel_opts=opts.LabelOpts(rotate=45)),
+            yaxis_opts=opts.AxisOpts(name="面积"),
+        )
+    )
+
+    # 各楼层类型的平均月租线条图
+    line_avg_floor_price = (
+        Line(init_opts=opts.InitOpts(theme='light'))
+        .add_xaxis(average_floor_price_pd["楼层类型"].tolist())
+        .add_yaxis("平均月租", average_floor_price_pd["平均月租"].tolist(), 
+                   label_opts=opts.LabelOpts(is_show=True, formatter="{c}"),
+                   linestyle_opts=opts.LineStyleOpts(color="#66FF66"),  # 设置颜色
+                   itemstyle_opts=opts.ItemStyleOpts(color="#66FF66"))  # 设置颜色
+        .set_global_opts(
+            title_opts=opts.TitleOpts(title="各楼层类型的平均月租"),
+            xaxis_opts=opts.AxisOpts(type_="category", name="楼层类型"),
+            yaxis_opts=opts.AxisOpts(name="月租"),
+        )
+    )
+
+    # 各地区房价中位月租盒须图
+    boxplot_median_price = Boxplot(init_opts=opts.InitOpts(theme='light'))
+    citiestats = boxplot_median_price.prepare_data([median_price_pd["中位月租"].tolist()])
+    boxplot_median_price.add_xaxis(["月租"])
+    boxplot_median_price.add_yaxis("", citiestats, label_opts=opts.LabelOpts(is_show=False))
+    boxplot_median_price.set_global_opts(
+        title_opts=opts.TitleOpts(title="全部地区月租Box")
+    )
+
+    # 各地区1、2、3楼层房数量的占比热力图
+    regions = floor_count_percentage_pd.index.tolist()
+    floor_counts = floor_count_percentage_pd.values.tolist()
+
+    heatmap_chart = (
+        HeatMap(init_opts=opts.InitOpts(theme='light'))
+        .add_xaxis(regions)
+        .add_yaxis("楼层类型", ["低层", "中层", "高层"], [[i, j, value] for i, values in enumerate(floor_counts) for j, value in enumerate(values)])
+        .set_global_opts(
+            title_opts=opts.TitleOpts(title="各地区1、2、3楼层房数量的占比"),
+            visualmap_opts=opts.VisualMapOpts(min_=0, max_=1, orient="horizontal", pos_bottom="10%")
+        )
+    )
+
+    # 各地区平均月租的漏斗图
+    funnel_chart = (
+        Funnel(init_opts=opts.InitOpts(theme='light'))
+        .add(
+            series_name="平均月租",
+            data_pair=[(region, price) for region, price in zip(average_price_pd["地区"], average_price_pd["平均月租"])],
+            sort_="descending",
+            label_opts=opts.LabelOpts(position="inside"),
+            tooltip_opts=opts.TooltipOpts(trigger="item", formatter="{a} <br/>{b}: {c}")
+        )
+        .set_global_opts(
+            title_opts=opts.TitleOpts(title="各地区平均月租漏斗图")
+        )
+    )
+
+    # 各地区月租中位数、平均月租和月租方差的复合柱状图
+    composite_bar_chart = (
+        Bar(init_opts=opts.InitOpts(theme='light'))
+        .add_xaxis(combined_stats_pd["地区"].tolist())
+        .add_yaxis("平均月租", combined_stats_pd["平均月租"].tolist(),
+                   label_opts=opts.LabelOpts(is_show=True, formatter="{c}"),
+                   itemstyle_opts=opts.ItemStyleOpts(color="#FF9999"))
+        .add_yaxis("中位月租", combined_stats_pd["中位月租"].tolist(),
+                   label_opts=opts.LabelOpts(is_show=True, formatter="{c}"),
+                   itemstyle_opts=opts.ItemStyleOpts(color="#99CCFF"))
+        .add_yaxis("月租标准差", combined_stats_pd["月租标准差"].tolist(),
+                   label_opts=opts.LabelOpts(is_show=True, formatter="{c}"),
+                   itemstyle_opts=opts.ItemStyleOpts(color="#66FF66"))
+        .set_global_opts(
+            title_opts=opts.TitleOpts(title="各地区月租中位数、平均月租和月租标准差"),
+            xaxis_opts=opts.AxisOpts(axislabel_opts=opts.LabelOpts(rotate=45)),
+            yaxis_opts=opts.AxisOpts(name="月租"),
+            legend_opts=opts.LegendOpts(pos_top="10%"),
+        )
+    )
+
+    return [
+        (bar_avg_price, "region_average_price.png"),
+        (boxplot_median_price, "region_median_price_boxplot.png"),
+        (bar_avg_area, "region_average_area.png"),
+        (line_avg_floor_price, "floor_average_price_line.png"),
+        (heatmap_chart, "floor_count_heatmap.png"),
+        (funnel_chart, "average_rental_funnel.png"),
+        (composite_bar_chart, "composite_rental_stats.png"),
+    ]
@@ -0,0 +1,275 @@
+"""
+地区 × 城市 × 楼层类型 汇总立方体
+
+先扫描一遍数据集，按 (城市, 楼层类型) 记下每个单元格的
+    数量、月租数量、月租合计、月租平方和、面积数量、面积合计、月租的 KLL 草图（见 fenxi_stream.py）
+地区由城市决定（fenxi_agg.region_mapping）。单元格只有几十到几百个，保存为一个小的 Arrow 文件；
+之后任意维度的汇总（地区、城市、楼层类型或它们的组合）都只合并这些单元格，不再扫描数据集。
+
+    python fenxi_cube.py build                              # extracted_data.arrow -> rent_cube.arrow
+    python fenxi_cube.py query 地区=华东 楼层类型=高层
+    python fenxi_cube.py query 城市=昆明 --by 楼层类型
+
+    cube = Cube.load('rent_cube.arrow')
+    cube.query(地区='华东', 楼层类型='高层')['平均月租']
+    cube.rollup(['城市'], 地区='华东')        # DataFrame，每个城市一行
+    cube.region_stats()                       # 与 fenxi_agg.region_stats 相同格式，图表可以直接使用
+
+中位月租为近似值（秩误差见 median_error），其余各项与全量计算一致。
+未缓存的查询约 50～200 µs（选中的单元格越多，要合并的草图越多），同样的查询再次执行时命中缓存，约 3 µs。
+"""
+import functools
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc
+
+from dataset import iter_chunks, locate
+from fenxi_agg import floor_codes, floor_types, other_region, region_mapping, stat_columns
+from fenxi_stream import KLLSketch, kll_k
+
+default_path = 'rent_cube.arrow'
+dimensions = ['地区', '城市', '楼层类型']
+# 单元格中累加的量
+measures = ['数量', '月租数量', '月租合计', '月租平方和', '面积数量', '面积合计']
+# 查询结果的统计项
+query_columns = ['数量', '平均月租', '中位月租', '月租标准差', '平均面积']
+
+
+class Cube:
+    def __init__(self, median_error=0.005):
+        self.k = kll_k(median_error)
+        self.cities = []
+        self.city_index = {}
+        self.values = np.zeros((0, len(measures)))
+        self.sketches = []
+        self._views = None
+        # 查询结果缓存，立方体变化时清空
+        self._query = functools.lru_cache(maxsize=4096)(self._query_cells)
+
+    def _add_cities(self, names):
+        for name in names:
+            if name not in self.city_index:
+                self.city_index[name] = len(self.cities)
+                self.cities.append(name)
+                self.sketches.extend(KLLSketch(self.k, seed=len(self.sketches) + i) for i in range(3))
+        missing = len(self.cities) * 3 - len(self.values)
+        if missing:
+            self.values = np.vstack([self.values, np.zeros((missing, len(measures)))])
+
+    def add(self, df):
+        """把一块数据（列同 region_stats）累加到立方体"""
+        city_codes, city_names = pd.factorize(df['城市'])
+        names = [None if pd.isna(c) else c for c in city_names] + [None]
+        self._add_cities(names)
+        lookup = np.array([self.city_index[c] for c in names], dtype=np.intp)
+        cell = lookup[city_codes] * 3 + floor_codes(df['楼层类型'])
+        size = len(self.values)
+        rent = df['月租'].to_numpy(dtype=float)
+        area = df['面积'].to_numpy(dtype=float)
+        valid = ~np.isnan(rent)
+        valid_area = ~np.isnan(area)
+        self.values += np.column_stack([
+            np.bincount(cell, minlength=size),
+            np.bincount(cell[valid], minlength=size),
+            np.bincount(cell[valid], weights=rent[valid], minlength=size),
+            np.bincount(cell[valid], weights=rent[valid] ** 2, minlength=size),
+            np.bincount(cell[valid_area], minlength=size),
+            np.bincount(cell[valid_area], weights=area[valid_area], minlength=size),
+        ])
+        order = np.argsort(cell[valid], kind='stable')
+        bounds = np.concatenate([[0], np.cumsum(np.bincount(cell[valid], minlength=size))])
+        sorted_rent = rent[valid][order]
+        for c in np.flatnonzero(np.diff(bounds)):
+            self.sketches[c].update(sorted_rent[bounds[c]:bounds[c + 1]])
+        self._views = None
+        return self
+
+    @classmethod
+    def build(cls, path, chunk_rows=1000000, median_error=0.005):
+        """分块扫描数据集（格式同 dataset.read_table）建立立方体"""
+        cube = cls(median_error)
+        for chunk in iter_chunks(path, chunk_rows, columns=['城市', '面积', '楼层类型', '月租']):
+            cube.add(chunk)
+        return cube
+
+    def to_table(self):
+        keep = np.flatnonzero(self.values[:, 0] > 0)
+        cities = np.repeat(np.array(self.cities, dtype=object), 3)[keep]
+        columns = {
+            '地区': pa.array([region_mapping.get(c, other_region) for c in cities], pa.string()),
+            '城市': pa.array(cities.tolist(), pa.string()),
+            '楼层类型': pa.array([floor_types[i % 3] for i in keep], pa.string()),
+        }
+        for j, name in enumerate(measures):
+            columns[name] = pa.array(self.values[keep, j])
+        columns['草图'] = pa.array([np.concatenate(self.sketches[i].levels) for i in keep], pa.list_(pa.float64()))
+        columns['草图层'] = pa.array([[len(items) for items in self.sketches[i].levels] for i in keep],
+                                   pa.list_(pa.int32()))
+        return pa.table(columns).replace_schema_metadata({'kll_k': str(self.k)})
+
+    def save(self, path=default_path):
+        import os
+
+        table = self.to_table()
+        with pa.OSFile(path + '.tmp', 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(path + '.tmp', path)
+        return path
+
+    @classmethod
+    def load(cls, path=default_path):
+        table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+        cube = cls()
+        cube.k = int(table.schema.metadata[b'kll_k'])
+        cities = table.column('城市').to_pylist()
+        floors = table.column('楼层类型').to_pylist()
+        cube._add_cities(dict.fromkeys(cities))
+        values = np.column_stack([table.column(name).to_numpy() for name in measures])
+        for row, (city, floor) in enumerate(zip(cities, floors)):
+            cell = cube.city_index[city] * 3 + floor_types.index(floor)
+            cube.values[cell] = values[row]
+            items = np.asarray(table.column('草图')[row].values, dtype=float)
+            sketch = cube.sketches[cell]
+            sketch.levels = np.split(items, np.cumsum(table.column('草图层')[row].values.to_numpy())[:-1])
+            sketch.count = int(values[row, measures.index('月租数量')])
+        return cube
+
+    def _cell_views(self):
+        """各单元格的维度值和草图的 (值, 权重)，查询时只做数组运算"""
+        if self._views is None:
+            cities = np.repeat(np.array(self.cities, dtype=object), 3)
+            keys = {
+                '地区': np.array([region_mapping.get(c, other_region) for c in cities], dtype=object),
+                '城市': cities,
+                '楼层类型': np.array(floor_types * len(self.cities), dtype=object),
+            }
+            weighted = []
+            for sketch in self.sketches:
+                weights = [np.full(len(items), 2.0 ** level) for level, items in enumerate(sketch.levels)]
+                weighted.append((np.concatenate(sketch.levels), np.concatenate(weights)))
+            self._views = keys, weighted
+            self._query.cache_clear()
+        return self._views
+
+    @staticmethod
+    def _check_dimensions(names):
+        for dim in names:
+            if dim not in dimensions:
+                raise ValueError(f"未知的维度 {dim}，可用的维度: {dimensions}")
+
+    def _select(self, filters):
+        keys, _ = self._cell_views()
+        mask = self.values[:, 0] > 0
+        self._check_dimensions(filters)
+        for dim, value in filters.items():
+            if isinstance(value, (list, tuple, set)):
+                mask &= np.isin(keys[dim], list(value))
+            else:
+                mask &= keys[dim] == value
+        return np.flatnonzero(mask)
+
+    def _summarize(self, cells):
+        _, weighted = self._cell_views()
+        count, rent_count, rent_sum, rent_sq, area_count, area_sum = self.values[cells].sum(axis=0)
+        mean = rent_sum / rent_count if rent_count else np.nan
+        # 样本方差（ddof=1），与 pandas 的 std 一致
+        var = (rent_sq - rent_count * mean * mean) / (rent_count - 1) if rent_count > 1 else np.nan
+        median = np.nan
+        if rent_count:
+            values = np.concatenate([weighted[c][0] for c in cells])
+            weights = np.concatenate([weighted[c][1] for c in cells])
+            order = np.argsort(values, kind='stable')
+            cumulative = np.cumsum(weights[order])
+            median = float(values[order][min(np.searchsorted(cumulative, 0.5 * cumulative[-1]), len(values) - 1)])
+        return {
+            '数量': int(count),
+            '平均月租': mean,
+            '中位月租': median,
+            '月租标准差': np.sqrt(max(var, 0.0)) if rent_count > 1 else np.nan,
+            '平均面积': area_sum / area_count if area_count else np.nan,
+            '月租合计': rent_sum,
+            '月租数量': rent_count,
+        }
+
+    def _query_cells(self, filters):
+        return self._summarize(self._select(dict(filters)))
+
+    def query(self, **filters):
+        """按维度过滤后汇总，如 query(地区='华东', 楼层类型='高层')；值可以是列表。返回统计项的 dict"""
+        key = tuple(sorted((dim, tuple(v) if isinstance(v, (list, tuple, set)) else v) for dim, v in filters.items()))
+        self._cell_views()
+        return dict(self._query(key))
+
+    def rollup(self, by, **filters):
+        """按 by 中的维度分组汇总，返回 DataFrame（索引为分组，列为 query_columns）"""
+        self._check_dimensions(by)
+        keys, _ = self._cell_views()
+        cells = self._select(filters)
+        groups = {}
+        for cell in cells:
+            groups.setdefault(tuple(keys[dim][cell] for dim in by), []).append(cell)
+        # 地区、城市按名称排序，楼层类型按 低层/中层/高层
+        def sort_key(item):
+            return tuple(floor_types.index(v) if dim == '楼层类型' else str(v) for dim, v in zip(by, item[0]))
+
+        rows = {group: self._summarize(np.array(members)) for group, members in sorted(groups.items(), key=sort_key)}
+        index = pd.MultiIndex.from_tuples(rows, names=by) if len(by) > 1 else pd.Index(
+            [group[0] for group in rows], name=by[0])
+        return pd.DataFrame(list(rows.values()), index=index, columns=query_columns)
+
+    def region_stats(self):
+        """与 fenxi_agg.region_stats 相同格式的地区统计表"""
+        stats = self.rollup(['地区'])
+        by_floor = {t: self.rollup(['地区'], 楼层类型=t) for t in floor_types}
+        for t in floor_types:
+            stats[f'{t}数量'] = by_floor[t]['数量'].reindex(stats.index, fill_value=0)
+        for t in floor_types:
+            stats[f'{t}占比'] = stats[f'{t}数量'] / stats['数量']
+        for t in floor_types:
+            totals = pd.DataFrame([self._query((('地区', r), ('楼层类型', t))) for r in stats.index],
+                                  index=stats.index)
+            stats[f'{t}月租合计'] = totals['月租合计']
+            stats[f'{t}月租数量'] = totals['月租数量']
+        return stats[stat_columns]
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='地区 × 城市 × 楼层类型 汇总立方体')
+    sub = parser.add_subparsers(dest='command', required=True)
+    build_parser = sub.add_parser('build', help='扫描数据集建立立方体')
+    build_parser.add_argument('--input', default=None, help='数据集，默认 extracted_data.arrow')
+    build_parser.add_argument('--output', default=default_path)
+    build_parser.add_argument('--chunk-rows', type=int, default=1000000)
+    build_parser.add_argument('--median-error', type=float, default=0.005, help='中位月租允许的秩误差')
+    query_parser = sub.add_parser('query', help='查询，如 地区=华东 楼层类型=高层')
+    query_parser.add_argument('filters', nargs='*', help='维度=值，值可以用逗号分隔多个')
+    query_parser.add_argument('--by', nargs='*', default=[], help='分组维度，如 --by 城市 楼层类型')
+    query_parser.add_argument('--cube', default=default_path)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        path = args.input or locate('extracted_data.arrow', 'extracted_data.csv')
+        cube = Cube.build(path, args.chunk_rows, args.median_error)
+        cube.save(args.output)
+        # cube.cities 中的 None 是城市缺失的行
+        print(f"{sum(c is not None for c in cube.cities)} 个城市的立方体已保存到 {args.output}")
+    else:
+        cube = Cube.load(args.cube)
+        filters = {}
+        for item in args.filters:
+            dim, _, value = item.partition('=')
+            filters[dim] = value.split(',') if ',' in value else value
+        try:
+            result = cube.rollup(args.by, **filters) if args.by else cube.query(**filters)
+        except ValueError as e:
+            parser.error(str(e))
+        if args.by:
+            print(result.round(1))
+        else:
+            for name, value in result.items():
+                print(f"{name}: {value:.0f}" if name.endswith('数量') else f"{name}: {value:.1f}")
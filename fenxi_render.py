@@ -0,0 +1,133 @@
+"""
+图表批量导出 PNG
+
+原来每张图调用一次 make_snapshot，每次都启动一个新的浏览器、写一个 render.html、再等 2 秒动画。
+这里所有图表共用一个无头 Chrome：每张图在单独的标签页中打开，各标签页同时加载、一起等待动画，
+再逐个取出图片，总耗时约为一次浏览器启动加一次等待。
+
+每张图的 HTML（数据、配置、主题、尺寸都在里面）算一个哈希，记录在 .render_cache/hashes.json。
+PNG 已存在且哈希没变的图直接跳过；全部跳过时不启动浏览器。删除 PNG 或传 force=True 可强制重新导出。
+
+    render_charts([(bar_avg_price, 'region_average_price.png'), ...])
+"""
+import base64
+import hashlib
+import json
+import os
+import time
+
+cache_dir = '.render_cache'
+
+# 与 snapshot_selenium 相同的取图脚本；页面还没画好（脚本未加载完）时返回 null
+snapshot_js = """
+var ele = document.querySelector('div[_echarts_instance_]');
+if (!ele || typeof echarts === 'undefined') { return null; }
+var chart = echarts.getInstanceByDom(ele);
+if (!chart) { return null; }
+return chart.getDataURL({type: 'png', pixelRatio: %s, excludeComponents: ['toolbox']});
+"""
+
+
+def chart_html(chart, output_name):
+    """把图表写成 HTML，返回 (html路径, 内容哈希)。chart_id 由输出文件名决定，同样的数据得到同样的 HTML"""
+    name = os.path.splitext(os.path.basename(output_name))[0]
+    chart.chart_id = hashlib.md5(name.encode('utf-8')).hexdigest()
+    html_path = os.path.join(cache_dir, name + '.html')
+    chart.render(html_path)
+    with open(html_path, 'rb') as f:
+        digest = hashlib.sha1(f.read()).hexdigest()
+    return html_path, digest
+
+
+def load_hashes():
+    path = os.path.join(cache_dir, 'hashes.json')
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def save_hashes(hashes):
+    path = os.path.join(cache_dir, 'hashes.json')
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(hashes, f, ensure_ascii=False, indent=1)
+    os.replace(path + '.tmp', path)
+
+
+def open_browser():
+    """启动一个无头 Chrome（与 snapshot_selenium 默认的浏览器相同）"""
+    from selenium import webdriver
+
+    options = webdriver.ChromeOptions()
+    options.add_argument('--headless=new')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--no-sandbox')
+    return webdriver.Chrome(options=options)
+
+
+def snapshot_tabs(driver, html_paths, delay=2, pixel_ratio=2, timeout=60):
+    """在同一个浏览器中每个页面开一个标签页同时加载，等待一次动画后逐个取图，返回 PNG 数据列表"""
+    first = driver.current_window_handle
+    handles = []
+    for i, html_path in enumerate(html_paths):
+        url = 'file://' + os.path.abspath(html_path)
+        if i == 0:
+            driver.get(url)
+            handles.append(first)
+        else:
+            # window.open 不等待页面加载完成，各标签页同时加载
+            known = set(driver.window_handles)
+            driver.execute_script('window.open(arguments[0], "_blank");', url)
+            handles.append(next(h for h in driver.window_handles if h not in known))
+    time.sleep(delay)  # 等待动画，所有标签页共用一次
+
+    images = []
+    for handle in handles:
+        driver.switch_to.window(handle)
+        deadline = time.time() + timeout
+        content = driver.execute_script(snapshot_js % pixel_ratio)
+        while content is None and time.time() < deadline:
+            time.sleep(0.2)
+            content = driver.execute_script(snapshot_js % pixel_ratio)
+        if content is None:
+            raise TimeoutError(f"{driver.current_url} 中的图表没有在 {timeout} 秒内画好")
+        images.append(base64.b64decode(content.split(',', 1)[1]))
+    for handle in handles[1:]:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(first)
+    return images
+
+
+def render_charts(charts, delay=2, pixel_ratio=2, tabs=8, force=False):
+    """
+    charts 为 [(图表, 输出PNG路径), ...]。
+    返回实际导出的 PNG 路径列表（跳过的不在其中）。tabs 为同时打开的标签页数。
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    hashes = load_hashes()
+    todo = []
+    for chart, output_name in charts:
+        html_path, digest = chart_html(chart, output_name)
+        key = os.path.abspath(output_name)
+        if not force and os.path.exists(output_name) and hashes.get(key) == [digest, pixel_ratio]:
+            print(f"{output_name} 未变化，跳过")
+            continue
+        todo.append((html_path, output_name, key, digest))
+    if not todo:
+        return []
+
+    driver = open_browser()
+    try:
+        for start in range(0, len(todo), tabs):
+            batch = todo[start:start + tabs]
+            images = snapshot_tabs(driver, [item[0] for item in batch], delay, pixel_ratio)
+            for (html_path, output_name, key, digest), image in zip(batch, images):
+                with open(output_name, 'wb') as f:
+                    f.write(image)
+                hashes[key] = [digest, pixel_ratio]
+                print(f"已导出 {output_name}")
+            save_hashes(hashes)
+    finally:
+        driver.quit()
+    return [item[1] for item in todo]
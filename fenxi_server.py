@@ -0,0 +1,290 @@
+"""
+本地统计查询服务
+
+启动时把清洗后的数据集读入内存一次：行按 城市×楼层类型 单元格排好序，只保留 float32 的月租和各单元格的
+数量、均值、二阶中心矩、面积合计。之后按 HTTP 请求做分组统计，以 JSON 返回，看板不用再调用 fenxi.py、读取 PNG。
+各项统计都是精确值（与 fenxi_agg.region_stats 一致）。
+
+    python fenxi_server.py --port 8050
+    GET /stats?by=地区,楼层类型&城市=北京,上海&楼层类型=高层&stats=数量,中位月租
+    GET /health
+
+by        分组维度（地区、城市、楼层类型，逗号分隔，可省略表示不分组）
+地区/城市/楼层类型  过滤条件，逗号分隔多个值
+stats     返回的统计项（数量、平均月租、中位月租、月租标准差、平均面积），默认全部
+
+结果按查询缓存（LRU）。数据集文件（或分片目录）的修改时间、大小变化时重新加载并清空缓存，
+检查最多每秒一次。压测见 benchmarks/loadtest.py。
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from dataset import locate, read_dataset
+from fenxi_agg import floor_codes, floor_types, region_codes
+
+dimensions = ['地区', '城市', '楼层类型']
+stat_names = ['数量', '平均月租', '中位月租', '月租标准差', '平均面积']
+
+
+def data_version(path):
+    """
+    数据集的版本：文件的修改时间和大小；分片目录为其中所有文件的修改时间和大小。
+    增量清洗正在写入的 .tmp 文件不计入，遍历和 stat 之间被改名或删除的文件跳过
+    """
+    if os.path.isdir(path):
+        entries = []
+        for root, _, files in os.walk(path):
+            for name in files:
+                if name.endswith('.tmp'):
+                    continue
+                try:
+                    st = os.stat(os.path.join(root, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((os.path.join(root, name), st.st_mtime_ns, st.st_size))
+        return tuple(sorted(entries))
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+class ResidentData:
+    """
+    常驻内存的数据集。行按 (城市, 楼层类型) 排序，每个 城市×楼层类型 单元格是连续的一段，单元格内月租从小到大。
+    各单元格的数量、月租均值和二阶中心矩、面积合计在加载时算好，查询只合并选中的单元格；
+    只有中位月租需要读取选中单元格的月租。
+    """
+
+    def __init__(self, path):
+        df = read_dataset(path, columns=['城市', '面积', '楼层类型', '月租'])
+        city_codes, cities = pd.factorize(df['城市'], sort=True)
+        # 城市为空的行放在最后一个编码
+        city_labels = [None if pd.isna(c) else c for c in cities] + [None]
+        city_codes = np.where(city_codes < 0, len(cities), city_codes)
+        cell = city_codes * 3 + floor_codes(df['楼层类型'])
+        num_cells = len(city_labels) * 3
+        rent = df['月租'].to_numpy(dtype=float)
+        area = df['面积'].to_numpy(dtype=float)
+
+        # 先按月租、再按单元格稳定排序：单元格内月租有序，缺失值排在每段最后
+        order = np.argsort(rent, kind='stable')
+        order = order[np.argsort(cell[order], kind='stable')]
+        cell, rent, area = cell[order], rent[order], area[order]
+        self.rent = rent.astype(np.float32)
+        self.bounds = np.concatenate([[0], np.cumsum(np.bincount(cell, minlength=num_cells))])
+
+        valid = ~np.isnan(rent)
+        self.rows = np.diff(self.bounds)
+        self.rent_n = np.bincount(cell[valid], minlength=num_cells)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.rent_mean = np.nan_to_num(np.bincount(cell[valid], weights=rent[valid], minlength=num_cells) /
+                                           self.rent_n)
+        deviation = rent[valid] - self.rent_mean[cell[valid]]
+        self.rent_m2 = np.bincount(cell[valid], weights=deviation * deviation, minlength=num_cells)
+        valid_area = ~np.isnan(area)
+        self.area_n = np.bincount(cell[valid_area], minlength=num_cells)
+        self.area_sum = np.bincount(cell[valid_area], weights=area[valid_area], minlength=num_cells)
+
+        cell_cities = np.repeat(np.array(city_labels, dtype=object), 3)
+        region, regions = region_codes(pd.Series(cell_cities))
+        self.cell_codes = {
+            '地区': region,
+            '城市': np.repeat(np.arange(len(city_labels)), 3),
+            '楼层类型': np.tile(np.arange(3), len(city_labels)),
+        }
+        self.labels = {'地区': regions, '城市': city_labels, '楼层类型': floor_types}
+        self.total_rows = len(df)
+
+    def summarize(self, cells, stats):
+        """合并若干单元格的统计"""
+        row = {}
+        n = self.rent_n[cells].sum()
+        mean = (self.rent_mean[cells] * self.rent_n[cells]).sum() / n if n else np.nan
+        if '数量' in stats:
+            row['数量'] = int(self.rows[cells].sum())
+        if '平均月租' in stats:
+            row['平均月租'] = mean
+        if '中位月租' in stats:
+            row['中位月租'] = self.median(cells, n)
+        if '月租标准差' in stats:
+            # 各单元格的二阶中心矩合并（Chan），样本标准差（ddof=1）与 pandas 一致
+            m2 = (self.rent_m2[cells] + self.rent_n[cells] * (self.rent_mean[cells] - mean) ** 2).sum() if n else 0
+            row['月租标准差'] = np.sqrt(m2 / (n - 1)) if n > 1 else np.nan
+        if '平均面积' in stats:
+            area_n = self.area_n[cells].sum()
+            row['平均面积'] = self.area_sum[cells].sum() / area_n if area_n else np.nan
+        return row
+
+    def median(self, cells, n):
+        """各单元格内月租已排序，单个单元格直接取中间值，多个单元格拼接后 partition"""
+        if n == 0:
+            return np.nan
+        parts = [self.rent[self.bounds[c]:self.bounds[c] + self.rent_n[c]] for c in cells]
+        values = parts[0] if len(parts) == 1 else np.concatenate(parts)
+        mid = n // 2
+        if len(parts) == 1:
+            low, high = float(values[mid - 1]), float(values[mid])
+        else:
+            values = np.partition(values, [mid - 1, mid] if n > 1 else [mid])
+            low, high = float(values[mid - 1]), float(values[mid])
+        return high if n % 2 else (low + high) / 2
+
+    def query(self, by=(), filters=None, stats=stat_names):
+        for dim in list(by) + list(filters or {}):
+            if dim not in dimensions:
+                raise ValueError(f"未知的维度 {dim}，可用的维度: {dimensions}")
+        for name in stats:
+            if name not in stat_names:
+                raise ValueError(f"未知的统计项 {name}，可用的统计项: {stat_names}")
+
+        mask = self.rows > 0
+        for dim, values in (filters or {}).items():
+            allowed = [i for i, label in enumerate(self.labels[dim]) if label in values]
+            mask &= np.isin(self.cell_codes[dim], allowed)
+        cells = np.flatnonzero(mask)
+
+        # 按分组维度的编码把选中的单元格分组，组的顺序同各维度标签的顺序
+        groups = {}
+        for c in cells:
+            groups.setdefault(tuple(self.cell_codes[dim][c] for dim in by), []).append(c)
+        output = []
+        for key in sorted(groups):
+            row = {dim: self.labels[dim][code] for dim, code in zip(by, key)}
+            for name, value in self.summarize(np.array(groups[key]), stats).items():
+                row[name] = value if name == '数量' else (None if np.isnan(value) else round(float(value), 2))
+            output.append({name: row[name] for name in list(by) + list(stats)})
+        return {'by': list(by), 'rows': output, 'total': int(self.rows[cells].sum())}
+
+
+class QueryServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # 并发连接多时不因 listen 队列满而等待重连
+
+    def __init__(self, address, path, cache_size=1024, check_interval=1.0):
+        super().__init__(address, QueryHandler)
+        self.path = path
+        self.cache_size = cache_size
+        self.check_interval = check_interval
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.version = data_version(path)
+        self.data = ResidentData(path)
+        self.loaded_at = time.time()
+        self.checked_at = time.monotonic()
+
+    def refresh(self):
+        """
+        数据集变化时重新加载并清空缓存。数据集正在更新、暂时读不了时继续用已加载的数据回答，
+        下一次检查时再重新加载
+        """
+        if time.monotonic() - self.checked_at < self.check_interval:
+            return
+        with self.lock:
+            self.checked_at = time.monotonic()
+            try:
+                version = data_version(self.path)
+                if version == self.version:
+                    return
+                data = ResidentData(self.path)
+            except (OSError, ValueError) as e:
+                print(f"重新加载 {self.path} 失败，继续使用已加载的数据: {e!r}", flush=True)
+                return
+            self.data, self.version, self.loaded_at = data, version, time.time()
+            self.cache.clear()
+
+    def answer(self, key):
+        """返回 (JSON 字节串, 是否命中缓存)"""
+        self.refresh()
+        with self.lock:
+            body = self.cache.get(key)
+            if body is not None:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                return body, True
+            self.misses += 1
+            data = self.data
+        by, filters, stats = key
+        body = json.dumps(data.query(by, dict(filters), stats), ensure_ascii=False).encode('utf-8')
+        with self.lock:
+            if data is self.data:  # 计算期间数据集没有被重新加载
+                self.cache[key] = body
+                if len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+        return body, False
+
+    def health(self):
+        with self.lock:
+            return {'path': self.path, 'rows': self.data.total_rows, 'loaded_at': self.loaded_at,
+                    'cache': {'size': len(self.cache), 'hits': self.hits, 'misses': self.misses}}
+
+
+def parse_query(query):
+    """查询字符串 -> 缓存键 (分组维度, 过滤条件, 统计项)，值都排好序，顺序不同的同一查询共用缓存"""
+    params = parse_qs(query)
+
+    def split(name):
+        return [v for value in params.get(name, []) for v in value.split(',') if v]
+
+    by = tuple(split('by'))
+    filters = tuple(sorted((dim, tuple(sorted(split(dim)))) for dim in dimensions if dim in params))
+    stats = tuple(split('stats')) or tuple(stat_names)
+    unknown = set(params) - set(dimensions) - {'by', 'stats'}
+    if unknown:
+        raise ValueError(f"未知的参数 {sorted(unknown)}")
+    return by, filters, stats
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # 支持 keep-alive
+    disable_nagle_algorithm = True  # 响应头和正文分两次写出，不关 Nagle 时每个请求要多等约 40ms 的延迟确认
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        if parts.path == '/health':
+            self.send_json(json.dumps(self.server.health(), ensure_ascii=False).encode('utf-8'))
+        elif parts.path == '/stats':
+            try:
+                body, hit = self.server.answer(parse_query(parts.query))
+            except ValueError as e:
+                self.send_json(json.dumps({'error': str(e)}, ensure_ascii=False).encode('utf-8'), 400)
+                return
+            self.send_json(body, headers={'X-Cache': 'HIT' if hit else 'MISS'})
+        else:
+            self.send_json(b'{"error": "not found"}', 404)
+
+    def send_json(self, body, status=200, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='本地统计查询服务')
+    parser.add_argument('--data', default=None, help='数据集，默认 extracted_data.arrow（不存在时用 extracted_data.csv）')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8050)
+    parser.add_argument('--cache-size', type=int, default=1024, help='缓存的查询结果数')
+    args = parser.parse_args()
+
+    path = args.data or locate('extracted_data.arrow', 'extracted_data.csv')
+    server = QueryServer((args.host, args.port), path, args.cache_size)
+    print(f"{server.data.total_rows} 行数据已加载，服务地址 http://{args.host}:{args.port}/stats?by=地区", flush=True)
+    server.serve_forever()
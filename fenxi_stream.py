@@ -0,0 +1,220 @@
+"""
+流式（外存）统计
+
+分块读取数据集，每块算完就丢弃，只保留各地区的可合并状态：
+    数量、各楼层类型数量、月租合计         整数/浮点累加
+    平均月租、月租标准差                   Welford / Chan 合并（均值 + 二阶中心矩），不会因大数相减损失精度
+    平均面积                               合计 / 数量
+    中位月租                               KLL 分位数草图，秩误差不超过 median_error（约 99% 概率）
+内存只和地区数、草图大小有关，与数据行数无关，可以分析比内存大得多的数据集。
+结果表的格式与 fenxi_agg.region_stats 相同，floor_stats、floor_share 和所有图表都可以直接使用；
+除中位月租为近似值外，其余各项与全量计算一致。默认 median_error=0.005 时，
+500 万行合成数据上各地区中位数的秩误差实测最大约 0.35%，在上限以内。
+
+    stats = stream_stats('extracted_data.arrow', chunk_rows=1000000, median_error=0.005)
+
+各块的状态可以用 merge 合并，多个进程或多台机器分别处理一部分数据后再汇总。
+"""
+import math
+import time
+
+import numpy as np
+import pandas as pd
+
+from dataset import iter_chunks
+from fenxi_agg import floor_codes, floor_types, other_region, region_codes, region_mapping
+
+# 所有可能的地区，各块的地区编码统一到这个顺序（按名称排序，与 region_stats 一致）
+all_regions = sorted(set(region_mapping.values()) | {other_region})
+
+
+def kll_k(error):
+    """给定归一化秩误差，返回 KLL 的 k（经验公式 error ≈ 2.296 / k^0.9723，约 99% 概率）"""
+    return max(8, math.ceil((2.296 / error) ** (1 / 0.9723)))
+
+
+class KLLSketch:
+    """
+    KLL 分位数草图。第 h 层的每个元素代表 2^h 个原始值；
+    某层超出容量时排序后随机取奇数位或偶数位提升到上一层，容量从顶层往下按 2/3 递减。
+    保存的元素数约为 3k，与数据量无关；两个草图可以合并。
+    """
+
+    def __init__(self, k=200, seed=None):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.count = 0
+        self.rng = np.random.default_rng(seed)
+
+    def capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self.count += len(values)
+            self.compress()
+
+    def merge(self, other):
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self.compress()
+        return self
+
+    def compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self.capacity(level):
+                items = np.sort(items)
+                # 个数为奇数时留下一个，其余两两取一个，权重翻倍
+                keep, items = items[:len(items) % 2], items[len(items) % 2:]
+                promoted = items[self.rng.integers(2)::2]
+                self.levels[level] = keep
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def quantile(self, q):
+        if self.count == 0:
+            return np.nan
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        values, cumulative = values[order], np.cumsum(weights[order])
+        return float(values[min(np.searchsorted(cumulative, q * cumulative[-1]), len(values) - 1)])
+
+    def median(self):
+        return self.quantile(0.5)
+
+    def size(self):
+        return sum(len(items) for items in self.levels)
+
+
+class StreamingStats:
+    """各地区的可合并统计状态，update 接收一块 DataFrame（列同 region_stats）"""
+
+    def __init__(self, median_error=0.005, seed=0):
+        num_regions = len(all_regions)
+        self.region_index = {region: i for i, region in enumerate(all_regions)}
+        self.rows = np.zeros((num_regions, 3), dtype=np.int64)
+        self.rent_counts = np.zeros((num_regions, 3))
+        self.rent_sums = np.zeros((num_regions, 3))
+        self.rent_mean = np.zeros(num_regions)
+        self.rent_m2 = np.zeros(num_regions)
+        self.area_counts = np.zeros(num_regions)
+        self.area_sums = np.zeros(num_regions)
+        k = kll_k(median_error)
+        self.sketches = [KLLSketch(k, seed=seed + i) for i in range(num_regions)]
+
+    def update(self, df):
+        codes, regions = region_codes(df['城市'])
+        # 块内的地区编码换成全局编码
+        codes = np.array([self.region_index[r] for r in regions], dtype=np.intp)[codes]
+        num_regions = len(all_regions)
+        floor = floor_codes(df['楼层类型'])
+        rent = df['月租'].to_numpy(dtype=float)
+        area = df['面积'].to_numpy(dtype=float)
+
+        cell = codes * 3 + floor
+        size = num_regions * 3
+        self.rows += np.bincount(cell, minlength=size).reshape(num_regions, 3)
+        valid = ~np.isnan(rent)
+        counts = np.bincount(cell[valid], minlength=size).reshape(num_regions, 3)
+        sums = np.bincount(cell[valid], weights=rent[valid], minlength=size).reshape(num_regions, 3)
+
+        # 块内各地区的均值和二阶中心矩，再按 Chan 的公式并入累计值
+        n_chunk = counts.sum(axis=1).astype(float)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_chunk = np.nan_to_num(sums.sum(axis=1) / n_chunk)
+        deviation = rent[valid] - mean_chunk[codes[valid]]
+        m2_chunk = np.bincount(codes[valid], weights=deviation * deviation, minlength=num_regions)
+        n = self.rent_counts.sum(axis=1)
+        self._merge_moments(n, n_chunk, mean_chunk, m2_chunk)
+        self.rent_counts += counts
+        self.rent_sums += sums
+
+        valid_area = ~np.isnan(area)
+        self.area_counts += np.bincount(codes[valid_area], minlength=num_regions)
+        self.area_sums += np.bincount(codes[valid_area], weights=area[valid_area], minlength=num_regions)
+
+        order = np.argsort(codes[valid], kind='stable')
+        bounds = np.concatenate([[0], np.cumsum(np.bincount(codes[valid], minlength=num_regions))])
+        sorted_rent = rent[valid][order]
+        for g in np.flatnonzero(n_chunk):
+            self.sketches[g].update(sorted_rent[bounds[g]:bounds[g + 1]])
+        return self
+
+    def _merge_moments(self, n, n_other, mean_other, m2_other):
+        total = n + n_other
+        with np.errstate(invalid='ignore', divide='ignore'):
+            delta = mean_other - self.rent_mean
+            self.rent_mean = np.where(total > 0, self.rent_mean + delta * n_other / total, 0.0)
+            self.rent_m2 = np.where(total > 0, self.rent_m2 + m2_other + delta * delta * n * n_other / total, 0.0)
+
+    def merge(self, other):
+        """并入另一份状态（例如另一个进程处理的那部分数据）"""
+        self._merge_moments(self.rent_counts.sum(axis=1), other.rent_counts.sum(axis=1), other.rent_mean,
+                            other.rent_m2)
+        self.rows += other.rows
+        self.rent_counts += other.rent_counts
+        self.rent_sums += other.rent_sums
+        self.area_counts += other.area_counts
+        self.area_sums += other.area_sums
+        for sketch, other_sketch in zip(self.sketches, other.sketches):
+            sketch.merge(other_sketch)
+        return self
+
+    def result(self):
+        """返回与 region_stats 相同格式的统计表"""
+        n = self.rent_counts.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            std = np.sqrt(self.rent_m2 / (n - 1))
+            floor_share = self.rows / self.rows.sum(axis=1, keepdims=True)
+        stats = pd.DataFrame({
+            '数量': self.rows.sum(axis=1),
+            '平均月租': np.where(n > 0, self.rent_mean, np.nan),
+            '中位月租': [sketch.median() for sketch in self.sketches],
+            '月租标准差': np.where(n > 1, std, np.nan),
+            '平均面积': np.divide(self.area_sums, self.area_counts, out=np.full(len(all_regions), np.nan),
+                              where=self.area_counts > 0),
+        }, index=pd.Index(all_regions, name='地区'))
+        for i, t in enumerate(floor_types):
+            stats[f'{t}数量'] = self.rows[:, i]
+        for i, t in enumerate(floor_types):
+            stats[f'{t}占比'] = np.nan_to_num(floor_share[:, i])
+        for i, t in enumerate(floor_types):
+            stats[f'{t}月租合计'] = self.rent_sums[:, i]
+            stats[f'{t}月租数量'] = self.rent_counts[:, i]
+        return stats[stats['数量'] > 0]
+
+
+def stream_stats(path, chunk_rows=1000000, median_error=0.005, timings=None):
+    """
+    分块读取 path（格式同 dataset.read_table），返回与 region_stats 相同格式的统计表。
+    传入 timings（dict）时把读取、聚合的秒数累加到 timings['load']、timings['aggregate']
+    """
+    if timings is None:
+        timings = {}
+    state = StreamingStats(median_error)
+    chunks = iter_chunks(path, chunk_rows, columns=['城市', '面积', '楼层类型', '月租'])
+    while True:
+        start = time.perf_counter()
+        chunk = next(chunks, None)
+        read = time.perf_counter()
+        timings['load'] = timings.get('load', 0.0) + read - start
+        if chunk is None:
+            break
+        state.update(chunk)
+        timings['aggregate'] = timings.get('aggregate', 0.0) + time.perf_counter() - read
+    start = time.perf_counter()
+    stats = state.result()
+    timings['aggregate'] = timings.get('aggregate', 0.0) + time.perf_counter() - start
+    return stats
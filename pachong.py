@@ -1,11 +1,12 @@
+import argparse
 import random
 import time
 import requests
-from bs4 import BeautifulSoup
 from fake_useragent import UserAgent
-import pandas as pd
 import os
 
+from pachong_parse import ParserPool, parse_page
+
 # 城市列表
 urls = [
     # 'https://bj.lianjia.com/zufang/pg{}/#contentList',
@@ -75,59 +76,113 @@ headers = {
 # 数据存储列表
 data_list = []
 
-# 输出文件路径
+# 输出文件路径，Excel为可选导出
 output_dir = 'D:\\VSProject\\pythonproject\\bigdata2'
-os.makedirs(output_dir, exist_ok=True)  # 确保目录存在
-output_file = os.path.join(output_dir, 'zufanglist4.xlsx')
+output_file = os.path.join(output_dir, 'zufanglist4.parquet')
+
+# 根据url提取城市和省份
+def city_of(url):
+    city_abbr = url.split('/')[2].split('.')[0]  # 提取城市缩写
+    return city_province_map.get(city_abbr, ('未知城市', '未知省份'))  # 根据缩写获取城市和省份
 
-# 抓取函数
-def fetch_data(url, num_pages=1):
+# 抓取函数，传入 checkpoint 时断点中已完成的页不再请求：replay 时从 cache 读出重新解析（没有缓存时重新请求），
+# 否则直接跳过（sink 追加到上次的输出文件时，这些页的行已经写出过）；新抓的页写入缓存并记录断点
+# 传入 sink（见 pachong_sink）时行直接写出，否则追加到 data_list
+def fetch_data(url, num_pages=1, cache=None, checkpoint=None, sink=None, replay=True):
+    emit = data_list.extend if sink is None else sink.write
     for num in range(1, num_pages + 1):
-        time.sleep(random.randint(10, 15))  # 防止请求过于频繁
         new_url = url.format(num)
-        city_abbr = url.split('/')[2].split('.')[0]  # 提取城市缩写
-        city, province = city_province_map.get(city_abbr, ('未知城市', '未知省份'))  # 根据缩写获取城市和省份
+        city, province = city_of(url)
+        if checkpoint is not None and checkpoint.done(city, num):
+            if not replay:
+                print(f"Skipping page {num} of {city} (done)")
+                continue
+            html = cache.get(new_url) if cache is not None else None
+            if html is not None:
+                print(f"Skipping page {num} of {city} (cached)")
+                emit(parse_page(html, province, city))
+                continue
+        time.sleep(random.randint(10, 15))  # 防止请求过于频繁
         print(f"Fetching page {num} of {city}...")
         try:
             ua = UserAgent()
             headers['User-Agent'] = ua.random
             res = requests.get(new_url, headers=headers)
             res.raise_for_status()  # 检查请求是否成功
-            bs = BeautifulSoup(res.text, 'lxml')
-            li_elements = bs.find_all("div", class_="content__list--item")
-            for li_element in li_elements:
-                item_locations = li_element.find('p', class_='content__list--item--des')
-                item_location = ''
-                if item_locations is not None:
-                    item_locations = item_locations.find_all('a')
-                    item_location = " - ".join([str(location.text.strip()) for location in item_locations])
-                item_houses = li_element.find('p', class_='content__list--item--des')
-                item_house = ",".join([str(house.text.strip()) for house in item_houses]).replace('\n', '').replace(' ', '').replace('-', '').replace(',/', '')
-                item_tags = li_element.find('p', class_='content__list--item--bottom oneline').find_all('i')
-                item_tag = ",".join([str(tag.text.strip()) for tag in item_tags])
-                item_brand = li_element.find('span', class_='brand')
-                if item_brand is not None:
-                    item_brand = item_brand.text.strip()
-                item_date = li_element.find('span', class_='content__list--item--time oneline')
-                if item_date is not None:
-                    item_date = item_date.text.strip()
-                item_price_content = li_element.find('span', class_='content__list--item-price').text.strip()
-                item_price = item_price_content.split(' ')[0]
-                item_unit = item_price_content.split(' ')[1]
-                data_list.append([province, city,  item_location, item_house, item_brand, item_date, item_price, item_unit])
+            if cache is not None:
+                cache.put(new_url, res.text, city, province, num)
+            emit(parse_page(res.text, province, city))
+            if checkpoint is not None:
+                checkpoint.mark(city, num)
         except requests.RequestException as e:
             print(f"Request failed: {e}")
         except Exception as e:
             print(f"An error occurred: {e}")
 
-# 执行抓取
-for url in urls:
-    top = random.randint(5, 6)  # 随机生成 10 到 20 之间的数字
-    fetch_data(url, top)
-    time.sleep(random.randint(1, 2))
 
-# 将数据保存到Excel文件中
-df = pd.DataFrame(data_list, columns=['省份', '城市', '位置', '房屋信息', '品牌', '日期', '价格', '单位'])
-df.to_excel(output_file, index=False, engine='openpyxl')
+if __name__ == '__main__':
+    from pachong_cache import Checkpoint, PageCache, cached_pages
+    from pachong_dedup import DedupIndex
+    from pachong_sink import ListingSink, export_excel
+
+    parser = argparse.ArgumentParser(description='链家租房数据抓取')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='异步模式：各城市并发抓取，每个主机独立限速')
+    parser.add_argument('--host-concurrency', type=int, default=1, help='异步模式下每个主机的并发上限')
+    parser.add_argument('--cache-dir', default='crawl_cache', help='页面缓存和断点文件目录')
+    parser.add_argument('--restart', action='store_true',
+                        help='清空断点，重新抓取所有页（缓存保留）。断点不会过期：已完成的页以后都不再请求，'
+                             '开始新的一轮抓取（抓最新的房源）必须加 --restart')
+    parser.add_argument('--from-cache', action='store_true', help='不联网，直接从缓存重新解析')
+    parser.add_argument('--parse-workers', type=int, default=None, help='解析进程数，默认为CPU核数')
+    parser.add_argument('--output', default=output_file, help='输出文件（.parquet / .arrow / .csv）')
+    parser.add_argument('--batch-size', type=int, default=5000, help='每批写出的行数')
+    parser.add_argument('--excel', action='store_true', help='抓取完成后另外导出Excel')
+    parser.add_argument('--overwrite', action='store_true',
+                        help='清空已有的输出文件（和去重索引），断点中已完成的页从缓存重新写出；默认接在后面追加，'
+                             '已完成的页直接跳过。新的一轮抓取仍需 --restart')
+    parser.add_argument('--no-dedup', action='store_true', help='不去重')
+    parser.add_argument('--dedup-capacity', type=int, default=10_000_000, help='去重索引容量（房源条数）')
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)  # 确保目录存在
+    cache = PageCache(args.cache_dir)
+    checkpoint = Checkpoint(os.path.join(args.cache_dir, 'checkpoint.jsonl'))
+    if args.restart:
+        checkpoint.reset()
+    # 去重索引跨次抓取保存，与输出文件一致（见 ListingSink）；从缓存重新解析时重写输出文件，只在本次内去重
+    dedup = None
+    if not args.no_dedup:
+        dedup_path = None if args.from_cache else os.path.join(args.cache_dir, 'dedup.bloom')
+        dedup = DedupIndex(dedup_path, capacity=args.dedup_capacity)
+
+    # 执行抓取，结果按批写出
+    # 追加到上次的输出文件时，断点中已完成的页的行已经在文件中，不再从缓存重新写出（replay=False）
+    append = not (args.overwrite or args.from_cache)
+    with ListingSink(args.output, args.batch_size, dedup, append) as sink:
+        if args.from_cache:
+            with ParserPool(args.parse_workers) as pool:
+                for rows in pool.map(cached_pages(cache)):
+                    sink.write(rows)
+        elif args.use_async:
+            import asyncio
+            from pachong_async import crawl_async
+
+            tasks = [(url, random.randint(5, 6)) + city_of(url) for url in urls]
+            asyncio.run(crawl_async(tasks, headers, concurrency=args.host_concurrency, cache=cache,
+                                    checkpoint=checkpoint, workers=args.parse_workers, sink=sink,
+                                    replay=not sink.append))
+        else:
+            for url in urls:
+                top = random.randint(5, 6)  # 随机生成 10 到 20 之间的数字
+                fetch_data(url, top, cache, checkpoint, sink, replay=not sink.append)
+                time.sleep(random.randint(1, 2))
+
+    print(f"{sink.rows_written} rows have been successfully saved to {sink.path} "
+          f"({sink.rows_kept} kept from previous runs, {sink.rows_dropped} duplicates dropped).")
 
-print(f"Data has been successfully saved to {output_file}.")
\ No newline at end of file
+    # 可选：导出Excel
+    if args.excel:
+        excel_path = os.path.splitext(sink.path)[0] + '.xlsx'
+        export_excel(sink.path, excel_path)
+        print(f"Excel exported to {excel_path}.")
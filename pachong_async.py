@@ -0,0 +1,136 @@
+"""
+异步抓取模式
+
+不同城市（sz.lianjia.com、cd.lianjia.com 等不同主机）同时抓取，
+每个主机保留自己的请求间隔和并发上限，所有请求共用一个 keep-alive 连接池。
+总耗时由最慢的城市决定，而不是所有城市耗时之和。
+
+用法: python pachong.py --async
+"""
+import asyncio
+import random
+from urllib.parse import urlsplit
+
+import aiohttp
+from fake_useragent import UserAgent
+
+from pachong_parse import ParserPool
+
+
+class HostLimiter:
+    """单个主机的限速器：并发上限 + 相邻两次请求之间的随机间隔（秒）"""
+
+    def __init__(self, concurrency=1, delay=(10, 15)):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.delay = delay
+        self.lock = asyncio.Lock()
+        self.next_time = 0.0
+
+    async def __aenter__(self):
+        await self.semaphore.acquire()
+        try:
+            async with self.lock:
+                loop = asyncio.get_running_loop()
+                wait = self.next_time - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)  # 防止同一主机请求过于频繁
+                self.next_time = loop.time() + random.uniform(*self.delay)
+        except BaseException:
+            self.semaphore.release()
+            raise
+        return self
+
+    async def __aexit__(self, *exc):
+        self.semaphore.release()
+
+
+async def fetch_page(session, limiter, url, num, city, province, headers, ua, cache=None, checkpoint=None,
+                     replay=True):
+    """
+    抓取一页，返回页面HTML；请求失败返回 None。已在断点中完成的页：replay 时直接读缓存（没有缓存时重新请求），
+    否则跳过，返回 None（其行已在追加写出的输出文件中）
+    """
+    new_url = url.format(num)
+    if checkpoint is not None and checkpoint.done(city, num):
+        if not replay:
+            return None
+        html = cache.get(new_url) if cache is not None else None
+        if html is not None:
+            return html
+    async with limiter:
+        try:
+            async with session.get(new_url, headers={**headers, 'User-Agent': ua.random}) as res:
+                res.raise_for_status()  # 检查请求是否成功
+                html = await res.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Request failed: {new_url} {e!r}")
+            return None
+    if cache is not None:
+        cache.put(new_url, html, city, province, num)
+    if checkpoint is not None:
+        checkpoint.mark(city, num)
+    return html
+
+
+async def fetch_city(session, limiter, pool, url, num_pages, city, province, headers, ua, cache=None, checkpoint=None,
+                     sink=None, replay=True):
+    """
+    抓取一个城市的所有页，每页抓到后立即交给解析进程池。
+    传入 sink 时每页解析完直接写出并返回空列表，否则按页码顺序返回行列表。
+    """
+    print(f"Fetching {num_pages} pages of {city}...")
+
+    async def fetch_and_parse(num):
+        html = await fetch_page(session, limiter, url, num, city, province, headers, ua, cache, checkpoint, replay)
+        if html is None:
+            return []
+        rows = await pool.parse(html, province, city)
+        if sink is not None:
+            sink.write(rows)
+            return []
+        return rows
+
+    pages = await asyncio.gather(*[fetch_and_parse(num) for num in range(1, num_pages + 1)])
+    rows = []
+    for page_rows in pages:
+        rows.extend(page_rows)
+    return rows
+
+
+async def crawl_async(tasks, headers, concurrency=1, delay=(10, 15), timeout=30, cache=None, checkpoint=None,
+                      workers=None, sink=None, trace_configs=None, replay=True):
+    """
+    并发抓取多个城市。
+
+    tasks: [(url模板, 页数, 城市, 省份), ...]，url模板同 pachong.urls
+    concurrency: 每个主机同时进行的请求数上限
+    delay: 同一主机相邻两次请求之间的间隔范围（秒）
+    cache/checkpoint: 见 pachong_cache，传入后断点中已完成的页不再请求
+    replay: 断点中已完成的页是否从缓存重新解析写出；sink 追加到上次的输出文件时为 False，这些页的行已经写出过
+    workers: 解析进程数，默认为CPU核数
+    sink: 见 pachong_sink.ListingSink，传入后行随抓随写，内存不随页数增长
+    trace_configs: aiohttp.TraceConfig 列表，用于基准测试统计请求延迟
+    返回所有城市的行列表，顺序与 tasks 一致；传入 sink 时返回空列表。
+    """
+    limiters = {}
+    for url, *_ in tasks:
+        host = urlsplit(url).netloc
+        if host not in limiters:
+            limiters[host] = HostLimiter(concurrency, delay)
+
+    ua = UserAgent()
+    connector = aiohttp.TCPConnector(limit_per_host=concurrency, keepalive_timeout=60)
+    with ParserPool(workers) as pool:
+        async with aiohttp.ClientSession(connector=connector,
+                                         timeout=aiohttp.ClientTimeout(total=timeout),
+                                         trace_configs=trace_configs) as session:
+            results = await asyncio.gather(*[
+                fetch_city(session, limiters[urlsplit(url).netloc], pool, url, num_pages, city, province, headers, ua,
+                           cache, checkpoint, sink, replay)
+                for url, num_pages, city, province in tasks
+            ])
+
+    data_list = []
+    for rows in results:
+        data_list.extend(rows)
+    return data_list
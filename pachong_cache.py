@@ -0,0 +1,101 @@
+"""
+断点续爬与页面缓存
+
+PageCache 把抓到的原始HTML按 (url, 抓取时间) 存到本地，Checkpoint 记录已完成的 (城市, 页码)。
+中断后重新运行会跳过已完成的页并直接读取缓存；解析步骤也可以完全离线地从缓存重跑。
+
+缓存目录结构:
+    crawl_cache/
+        index.jsonl       每行一条: url、抓取时间、城市、省份、页码、文件名
+        checkpoint.jsonl  每行一条已完成的 (城市, 页码)
+        pages/<sha1>.html
+"""
+import hashlib
+import json
+import os
+import time
+
+
+def _read_jsonl(path):
+    if not os.path.exists(path):
+        return
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue  # 中断时写了一半的行
+
+
+def _append_jsonl(path, record):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class PageCache:
+    """原始HTML缓存，键为 url + 抓取时间；同一 url 取最新一次"""
+
+    def __init__(self, cache_dir='crawl_cache'):
+        self.cache_dir = cache_dir
+        self.page_dir = os.path.join(cache_dir, 'pages')
+        self.index_file = os.path.join(cache_dir, 'index.jsonl')
+        os.makedirs(self.page_dir, exist_ok=True)
+        self.index = {}
+        for entry in _read_jsonl(self.index_file):
+            self.index[entry['url']] = entry
+
+    def put(self, url, html, city, province, page):
+        fetched_at = time.time()
+        name = hashlib.sha1(f"{url}\0{fetched_at}".encode('utf-8')).hexdigest() + '.html'
+        path = os.path.join(self.page_dir, name)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(html)
+        os.replace(path + '.tmp', path)  # 先写完页面再写索引，中断时不会留下半个文件
+        entry = {'url': url, 'fetched_at': fetched_at, 'city': city, 'province': province,
+                 'page': page, 'file': name}
+        _append_jsonl(self.index_file, entry)
+        self.index[url] = entry
+        return entry
+
+    def read(self, entry):
+        with open(os.path.join(self.page_dir, entry['file']), encoding='utf-8') as f:
+            return f.read()
+
+    def get(self, url):
+        entry = self.index.get(url)
+        if entry is None:
+            return None
+        return self.read(entry)
+
+    def entries(self):
+        """按抓取时间顺序返回每个 url 最新的缓存记录"""
+        return sorted(self.index.values(), key=lambda entry: entry['fetched_at'])
+
+
+class Checkpoint:
+    """已完成的 (城市, 页码) 记录，每完成一页立即落盘"""
+
+    def __init__(self, path):
+        self.path = path
+        self.done_pages = {(r['city'], r['page']) for r in _read_jsonl(path)}
+
+    def done(self, city, page):
+        return (city, page) in self.done_pages
+
+    def mark(self, city, page):
+        if (city, page) not in self.done_pages:
+            _append_jsonl(self.path, {'city': city, 'page': page})
+            self.done_pages.add((city, page))
+
+    def reset(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.done_pages = set()
+
+
+def cached_pages(cache):
+    """不发任何网络请求，按抓取顺序逐个返回缓存页面 (html, 省份, 城市)，可直接送入 ParserPool.map"""
+    for entry in cache.entries():
+        yield cache.read(entry), entry['province'], entry['city']
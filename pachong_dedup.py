@@ -0,0 +1,93 @@
+"""
+房源去重索引
+
+链家列表在抓取过程中会移动，同一条房源常出现在相邻两页或前后两次抓取中。
+每条房源取指纹（城市 + 位置 + 房屋信息 + 价格 + 品牌），写入前先查布隆过滤器，重复的直接丢弃。
+过滤器大小由容量和误判率固定，内存不随抓取量增长，并保存到磁盘供下次抓取使用。
+
+误判率即"把新房源当成重复"的概率，默认 1e-4；容量 1000 万条时约占 24MB。
+"""
+import hashlib
+import math
+import os
+import struct
+
+_header = struct.Struct('<8sQQQd')  # 魔数, 位数, 哈希次数, 已插入数, 误判率
+_magic = b'ZFBLOOM1'
+
+
+def fingerprint(row):
+    """房源指纹，row 为 [省份, 城市, 位置, 房屋信息, 品牌, 日期, 价格, 单位]"""
+    key = '\x1f'.join('' if v is None else str(v) for v in (row[1], row[2], row[3], row[6], row[4]))
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+
+
+class DedupIndex:
+    """
+    基于布隆过滤器的去重索引。
+
+    path 为 None 时只在内存中使用；否则启动时加载已有索引，save() 时写回。
+    """
+
+    def __init__(self, path=None, capacity=10_000_000, error_rate=1e-4):
+        self.path = path
+        if path and os.path.exists(path):
+            self._load(path)
+            return
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.error_rate = error_rate
+        self.count = 0
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _load(self, path):
+        with open(path, 'rb') as f:
+            magic, self.num_bits, self.num_hashes, self.count, self.error_rate = _header.unpack(f.read(_header.size))
+            if magic != _magic:
+                raise ValueError(f"{path} 不是去重索引文件")
+            self.bits = bytearray(f.read())
+
+    def _positions(self, fp):
+        # 双重哈希: h1 + i * h2
+        h1, h2 = struct.unpack('<QQ', fp)
+        h2 |= 1
+        m = self.num_bits
+        return [(h1 + i * h2) % m for i in range(self.num_hashes)]
+
+    def __contains__(self, row):
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(fingerprint(row)))
+
+    def add(self, row):
+        """加入一条房源；之前没见过返回 True，重复返回 False"""
+        bits = self.bits
+        new = False
+        for p in self._positions(fingerprint(row)):
+            mask = 1 << (p & 7)
+            if not bits[p >> 3] & mask:
+                bits[p >> 3] |= mask
+                new = True
+        if new:
+            self.count += 1
+        return new
+
+    def clear(self):
+        """清空索引（容量和误判率不变）"""
+        self.bits = bytearray(len(self.bits))
+        self.count = 0
+
+    def filter(self, rows):
+        """返回 rows 中没见过的房源，并把它们加入索引"""
+        return [row for row in rows if self.add(row)]
+
+    def __len__(self):
+        return self.count
+
+    def save(self, path=None):
+        path = path or self.path
+        if not path:
+            return
+        with open(path + '.tmp', 'wb') as f:
+            f.write(_header.pack(_magic, self.num_bits, self.num_hashes, self.count, self.error_rate))
+            f.write(self.bits)
+        os.replace(path + '.tmp', path)
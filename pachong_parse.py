@@ -0,0 +1,125 @@
+"""
+房源列表页解析
+
+用预编译的 XPath 直接在 lxml 树上取字段，代替 BeautifulSoup 的 find/find_all，
+输出与原来的解析完全一致: [省份, 城市, 位置, 房屋信息, 品牌, 日期, 价格, 单位]。
+ParserPool 把解析放到进程池里，抓取端只负责把页面送进队列，不在网络线程上做解析。
+
+性能对比见 benchmarks/bench_parse.py
+"""
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+
+import lxml.html
+from lxml import etree
+
+columns = ['省份', '城市', '位置', '房屋信息', '品牌', '日期', '价格', '单位']
+
+
+def _has_class(name):
+    # 与 BeautifulSoup 的 class_='x' 一致：class 属性中包含 x 这个词
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _class_is(value):
+    # 与 BeautifulSoup 的 class_='x y' 一致：整个 class 属性等于 'x y'
+    return f"normalize-space(@class)='{value}'"
+
+
+find_items = etree.XPath(f"//div[{_has_class('content__list--item')}]")
+find_des = etree.XPath(f".//p[{_has_class('content__list--item--des')}]")
+find_links = etree.XPath(".//a")
+find_bottom = etree.XPath(f".//p[{_class_is('content__list--item--bottom oneline')}]")
+find_tags = etree.XPath(".//i")
+find_brand = etree.XPath(f".//span[{_has_class('brand')}]")
+find_date = etree.XPath(f".//span[{_class_is('content__list--item--time oneline')}]")
+find_price = etree.XPath(f".//span[{_has_class('content__list--item-price')}]")
+
+
+def _text(element):
+    # 与 BeautifulSoup 的 tag.text 一致；注释节点的 text 为空
+    if not isinstance(element.tag, str):
+        return ''
+    return element.text_content()
+
+
+def _first(xpath, element):
+    found = xpath(element)
+    return found[0] if found else None
+
+
+def _child_texts(element):
+    # 依次返回直接子节点（文本和标签）的文字，对应 BeautifulSoup 中 for child in tag
+    if element.text:
+        yield element.text
+    for child in element:
+        yield _text(child)
+        if child.tail:
+            yield child.tail
+
+
+def parse_page(html, province, city):
+    """解析单页房源，返回行列表；某条房源解析出错时保留之前的行并停止本页"""
+    rows = []
+    try:
+        if not html or not html.strip():
+            return rows
+        tree = lxml.html.document_fromstring(html)
+        for li_element in find_items(tree):
+            item_des = _first(find_des, li_element)
+            item_location = ''
+            if item_des is not None:
+                item_location = " - ".join([_text(a).strip() for a in find_links(item_des)])
+            item_house = ",".join([text.strip() for text in _child_texts(item_des)]).replace('\n', '').replace(' ', '').replace('-', '').replace(',/', '')
+            item_tags = find_tags(_first(find_bottom, li_element))
+            item_tag = ",".join([_text(tag).strip() for tag in item_tags])
+            item_brand = _first(find_brand, li_element)
+            if item_brand is not None:
+                item_brand = _text(item_brand).strip()
+            item_date = _first(find_date, li_element)
+            if item_date is not None:
+                item_date = _text(item_date).strip()
+            item_price_content = _text(_first(find_price, li_element)).strip()
+            item_price = item_price_content.split(' ')[0]
+            item_unit = item_price_content.split(' ')[1]
+            rows.append([province, city, item_location, item_house, item_brand, item_date, item_price, item_unit])
+    except Exception as e:
+        print(f"An error occurred: {e}")
+    return rows
+
+
+def _parse_args(args):
+    return parse_page(*args)
+
+
+class ParserPool:
+    """
+    解析进程池。抓取端提交 (html, 省份, 城市)，解析在其它核上完成。
+
+    with ParserPool() as pool:
+        rows = pool.submit(html, province, city).result()     # 同步代码
+        rows = await pool.parse(html, province, city)         # asyncio 代码
+        for rows in pool.map(pages): ...                      # 批量，pages 为 (html, 省份, 城市) 可迭代对象
+    """
+
+    def __init__(self, workers=None):
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+
+    def submit(self, html, province, city):
+        return self.executor.submit(parse_page, html, province, city)
+
+    async def parse(self, html, province, city):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, parse_page, html, province, city)
+
+    def map(self, pages, chunksize=8):
+        return self.executor.map(_parse_args, pages, chunksize=chunksize)
+
+    def close(self):
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,205 @@
+"""
+抓取结果的流式写出
+
+ListingSink 按固定批次把行追加到列式文件（Parquet 或 Arrow IPC），没有安装 pyarrow 时退回到 CSV。
+内存中最多只保留一个批次，抓取多少页都不会增长；Excel 改为事后从该文件导出。
+
+with ListingSink('zufanglist4.parquet') as sink:
+    sink.write(rows)
+export_excel('zufanglist4.parquet', 'zufanglist4.xlsx')
+"""
+import csv
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+from pachong_parse import columns
+
+
+def _format_of(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.arrow', '.feather', '.ipc'):
+        return 'arrow'
+    if ext == '.csv':
+        return 'csv'
+    return 'parquet'
+
+
+class ListingSink:
+    """
+    按批写出房源行: [省份, 城市, 位置, 房屋信息, 品牌, 日期, 价格, 单位]
+
+    path 的扩展名决定格式: .parquet（默认）/ .arrow / .csv；
+    没有 pyarrow 时自动改写为同名 .csv 文件。
+    append=True 且输出文件已存在时保留其中的行，新行接在后面（Parquet / Arrow 写到临时文件，关闭时替换）；
+    否则清空输出文件。
+    传入 dedup（见 pachong_dedup.DedupIndex）时写入前去重。索引与输出文件一致：清空输出文件时索引也清空，
+    追加时已有的行也加入索引；关闭时（包括出错中断）与输出文件一起保存，
+    所以重跑时被判为重复的房源都已在输出文件中。
+    """
+
+    def __init__(self, path, batch_size=5000, dedup=None, append=False):
+        self.format = _format_of(path)
+        if pa is None and self.format != 'csv':
+            path = os.path.splitext(path)[0] + '.csv'
+            self.format = 'csv'
+            print(f"pyarrow 未安装，改为写出CSV: {path}")
+        self.path = path
+        self.batch_size = batch_size
+        self.batch = []
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self.rows_kept = 0
+        self.dedup = dedup
+        self.writer = None
+        self.file = None
+        # 是否确实接在已有的输出文件后面（文件不存在时与清空相同）
+        self.append = append = append and os.path.exists(path)
+        if dedup is not None and not append:
+            dedup.clear()
+        if self.format == 'csv':
+            if append:
+                self._keep_csv_rows()
+                self.file = open(path, 'a', newline='', encoding='utf-8-sig')
+                self.writer = csv.writer(self.file)
+            else:
+                self.file = open(path, 'w', newline='', encoding='utf-8-sig')
+                self.writer = csv.writer(self.file)
+                self.writer.writerow(columns)
+            self.tmp_path = None
+        else:
+            self.schema = pa.schema([(name, pa.string()) for name in columns])
+            # 追加时先写到临时文件，关闭时替换，出错前原文件保持不变
+            self.tmp_path = path + '.tmp' + os.path.splitext(path)[1] if append else None
+            out_path = self.tmp_path or path
+            if self.format == 'parquet':
+                self.writer = pq.ParquetWriter(out_path, self.schema, compression='zstd')
+            else:
+                self.file = pa.OSFile(out_path, 'wb')
+                self.writer = pa.ipc.new_file(self.file, self.schema)
+            if append:
+                self._keep_arrow_rows()
+
+    def _keep_csv_rows(self):
+        with open(self.path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row in reader:
+                self._keep([value or None for value in row])
+
+    def _keep_arrow_rows(self):
+        if self.format == 'parquet':
+            batches = pq.ParquetFile(self.path).iter_batches(batch_size=self.batch_size)
+        else:
+            source = pa.memory_map(self.path)
+            reader = pa.ipc.open_file(source)
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        for batch in batches:
+            batch = batch.select(columns).cast(self.schema)
+            self.writer.write_batch(batch)
+            if self.dedup is not None:
+                for row in zip(*(column.to_pylist() for column in batch.columns)):
+                    self._keep(row)
+            else:
+                self.rows_kept += batch.num_rows
+        if self.format != 'parquet':
+            source.close()
+
+    def _keep(self, row):
+        # 已有的行原样保留，只加入索引
+        if self.dedup is not None:
+            self.dedup.add(row)
+        self.rows_kept += 1
+
+    def write(self, rows):
+        if self.dedup is not None:
+            new_rows = self.dedup.filter(rows)
+            self.rows_dropped += len(rows) - len(new_rows)
+            rows = new_rows
+        self.batch.extend(rows)
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.batch:
+            return
+        if self.format == 'csv':
+            self.writer.writerows(self.batch)
+            self.file.flush()
+        else:
+            arrays = [pa.array([None if v is None else str(v) for v in values], pa.string())
+                      for values in zip(*self.batch)]
+            self.writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+        self.rows_written += len(self.batch)
+        self.batch = []
+
+    def close(self):
+        self.flush()
+        if self.format != 'csv':
+            self.writer.close()
+        if self.file is not None:
+            self.file.close()
+        if self.tmp_path is not None:
+            os.replace(self.tmp_path, self.path)
+        if self.dedup is not None:
+            self.dedup.save()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def iter_listings(path, batch_size=100000):
+    """按批读取抓取结果文件，逐批返回 DataFrame；支持 .parquet / .arrow / .csv / .xlsx"""
+    import pandas as pd
+
+    fmt = os.path.splitext(path)[1].lower()
+    if fmt == '.xlsx':
+        yield from _iter_excel(path, batch_size)
+    elif fmt == '.csv':
+        yield from pd.read_csv(path, chunksize=batch_size, dtype=str, keep_default_na=False, na_values=[''])
+    elif _format_of(path) == 'arrow':
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                yield reader.get_batch(i).to_pandas()
+    else:
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+            yield batch.to_pandas()
+
+
+def _iter_excel(path, batch_size):
+    # openpyxl 只读模式逐行读取，不把整个工作表读进内存
+    import pandas as pd
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = list(next(rows))
+        batch = []
+        for row in rows:
+            batch.append(['' if v is None else str(v) for v in row])
+            if len(batch) >= batch_size:
+                yield pd.DataFrame(batch, columns=header).replace('', None)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header).replace('', None)
+    finally:
+        workbook.close()
+
+
+def export_excel(path, xlsx_path):
+    """从抓取结果文件导出Excel（可选步骤）"""
+    import pandas as pd
+
+    df = pd.concat(list(iter_listings(path)), ignore_index=True)
+    df.to_excel(xlsx_path, index=False, engine='openpyxl')
+    return xlsx_path
@@ -1,86 +1,248 @@
+import numpy as np
 import pandas as pd
 import re
 
-# 读取Excel文件
-df = pd.read_excel(r'zufanglist4.xlsx')
-
-# 定义正则表达式模式来提取面积信息
-area_pattern = re.compile(r'(\d+(\.\d+)?)㎡')
-
-# 定义正则表达式模式来提取楼层信息
-floor_number_pattern = re.compile(r'(\d+)层')
-floor_type_pattern = re.compile(r'([低中高])楼层')
+# 定义正则表达式来提取面积、楼层和楼层类型信息
+# 三个可选的前瞻分别在整段文字中找第一次出现的位置，与逐个 re.search 的结果相同，
+# 这样一次 str.extract 就能扫描完房屋信息
+house_info_pattern = re.compile(
+    r'^(?:(?=.*?(?P<面积>\d+(?:\.\d+)?)㎡))?'
+    r'(?:(?=.*?(?P<楼层>\d+)层))?'
+    r'(?:(?=.*?(?P<楼层类型>[低中高])楼层))?',
+    re.S,
+)
 
 # 定义正则表达式模式来提取价格信息
 price_pattern = re.compile(r'(\d+)-(\d+)')
 
-# 提取面积信息
-def extract_area(house_info):
-    match = re.search(area_pattern, house_info)
-    if match:
-        area = float(match.group(1))  # 转换为浮点数
-        return area
-    else:
-        return None
+floor_type_mapping = {'高': 3, '中': 2, '低': 1}
 
-df['面积'] = df['房屋信息'].apply(extract_area)
 
-# 提取楼层信息
-def extract_floor_info(house_info):
-    floor_match = re.search(floor_number_pattern, house_info)
-    type_match = re.search(floor_type_pattern, house_info)
-    
-    if floor_match:
-        floor_number = int(floor_match.group(1))  # 转换为整数
-    else:
-        floor_number = None
-    
-    if type_match:
-        floor_type = type_match.group(1)
-        if floor_type == '高':
-            floor_type_value = 3
-        elif floor_type == '中':
-            floor_type_value = 2
-        elif floor_type == '低':
-            floor_type_value = 1
-        else:
-            floor_type_value = None
-    else:
-        floor_type_value = None
-    
-    return floor_number, floor_type_value
+# 提取面积、楼层和楼层类型信息
+def extract_house_info(house_info):
+    info = house_info.astype(str).str.extract(house_info_pattern)
+    return pd.DataFrame({
+        '面积': info['面积'].astype(float),
+        '楼层': info['楼层'].astype(float),
+        '楼层类型': info['楼层类型'].map(floor_type_mapping).astype(float),
+    }, index=house_info.index)
 
-df[['楼层', '楼层类型']] = df['房屋信息'].apply(extract_floor_info).apply(pd.Series)
 
-# 提取价格信息并计算平均值
+# 提取价格信息：区间取平均值，否则按数字解析
 def extract_price(price_info):
-    match = re.search(price_pattern, price_info)
-    if match:
-        low_price = int(match.group(1))
-        high_price = int(match.group(2))
-        return (low_price + high_price) / 2
-    else:
-        try:
-            return float(price_info)
-        except ValueError:
-            return None
+    price_info = price_info.astype(str)
+    price_range = price_info.str.extract(price_pattern).astype(float)
+    price = ((price_range[0] + price_range[1]) / 2).to_numpy(dtype=float, copy=True)
+    single = np.isnan(price)
+    parsed = pd.to_numeric(price_info[single], errors='coerce').to_numpy(dtype=float, copy=True)
+    # to_numeric 不认识但 float() 认识的写法（如带空格、全角数字）逐个处理，保证与原来的结果一致
+    unparsed = np.isnan(parsed) & (price_info[single] != 'nan').to_numpy()
+    if unparsed.any():
+        parsed[unparsed] = [_to_float(v) for v in price_info[single][unparsed]]
+    price[single] = parsed
+    return pd.Series(price, index=price_info.index)
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except ValueError:
+        return np.nan
+
+
+# 清洗原始数据，返回 省份、城市、面积、楼层类型、价格
+def clean(df):
+    info = extract_house_info(df['房屋信息'])
+    df = df.assign(面积=info['面积'].to_numpy(), 楼层=info['楼层'].to_numpy(), 楼层类型=info['楼层类型'].to_numpy(),
+                   价格=extract_price(df['价格']).to_numpy())
+
+    # 处理缺失值：如果面积或楼层信息为空，则填充为默认值
+    df['面积'] = df['面积'].fillna(0.0)
+    df['楼层类型'] = df['楼层类型'].fillna(2).astype(int)
+    df['价格'] = df['价格'].fillna(0.0)
+
+    # 提取所需的列
+    columns_to_extract = ['省份', '城市',  '面积', '楼层类型', '价格']
+    return df[columns_to_extract]
+
+
+# 清洗一个数据块并按 省份/城市 分区写出 parquet，返回行数（在进程池中运行）
+def clean_chunk_to_partitions(chunk, out_dir, chunk_id):
+    import pyarrow.dataset as ds
+
+    from dataset import to_table
+
+    df_extracted = clean(chunk)
+    table = to_table(df_extracted)
+    ds.write_dataset(table, out_dir, format='parquet', partitioning=['省份', '城市'], partitioning_flavor='hive',
+                     basename_template=f'part-{chunk_id:05d}-{{i}}.parquet',
+                     existing_data_behavior='overwrite_or_ignore')
+    return len(df_extracted)
+
+
+# 分块读取原始数据，在多个进程中并行清洗，结果写到按 省份/城市 分区的目录
+# 同时在途的数据块不超过 2 * workers 个，峰值内存约为每个进程一个块
+def clean_chunked(input_paths, out_dir, workers=None, chunk_rows=200000):
+    import glob
+    import os
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    from dataset import unquote_partitions
+    from pachong_sink import iter_listings
 
-df['价格'] = df['价格'].apply(extract_price)
+    workers = workers or os.cpu_count()
+    if isinstance(input_paths, str):
+        input_paths = [input_paths]
+    chunks = (chunk for path in input_paths for chunk in iter_listings(path, chunk_rows))
+    os.makedirs(out_dir, exist_ok=True)
+    for old_part in glob.glob(os.path.join(out_dir, '省份=*', '城市=*', 'part-*.parquet')):
+        os.remove(old_part)  # 清除上次运行的分区文件
 
-# 处理缺失值：如果面积或楼层信息为空，则填充为默认值
-df['面积'] = df['面积'].fillna(0.0)
-df['楼层类型'] = df['楼层类型'].fillna(2).astype(int)
-df['价格'] = df['价格'].fillna(0.0)
+    total = 0
+    pending = set()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk_id, chunk in enumerate(chunks):
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                total += sum(f.result() for f in done)
+            pending.add(pool.submit(clean_chunk_to_partitions, chunk, out_dir, chunk_id))
+        total += sum(f.result() for f in pending)
+    unquote_partitions(out_dir)  # 目录名还原为 省份=广东/城市=深圳，Spark 可以直接读取
+    return total
 
-# 提取所需的列
-columns_to_extract = ['省份', '城市',  '面积', '楼层类型', '价格']
-df_extracted = df[columns_to_extract]
 
-# 显示结果
-print(df_extracted)
+# 房源键：与抓取去重的指纹（pachong_dedup.fingerprint）取同样的列，日期是"7天前维护"这类相对时间，不参与
+listing_key_columns = ['城市', '位置', '房屋信息', '价格', '品牌']
 
-# 保存到新的Excel文件
-save_path = r'extracted_data.xlsx' #记得转换为csv
-df_extracted.to_excel(save_path, index=False, engine='openpyxl')
 
-print(f"数据已保存到 {save_path}")
\ No newline at end of file
+# 原始数据每行的房源键（uint64）
+def listing_keys(chunk):
+    keys = chunk.reindex(columns=listing_key_columns).fillna('').astype(str)
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+
+# 增量清洗：只清洗之前没有处理过的房源，作为新分片追加到数据集目录
+# 按房源键而不是按文件位置记录进度：抓取结果被重写、重排或变短都不影响已清洗的数据，
+# 同一房源再次出现时清洗结果相同，直接跳过。每个分片旁边保存其房源键（part-xxxxx.keys.npy），
+# out_dir/_watermark.json 记录已提交的分片。分片先写成 .tmp，记录更新后再改名，中断后重跑不会重复或丢失数据。
+# 已清洗的数据只有 rebuild=True 时才会删除，之后重新清洗全部输入。
+def clean_incremental(input_paths, out_dir, chunk_rows=200000, rebuild=False):
+    import json
+    import os
+
+    from dataset import write_dataset
+    from pachong_sink import iter_listings
+
+    if os.path.isfile(out_dir):
+        raise FileExistsError(f"{out_dir} 是全量清洗写出的单个文件，增量模式需要数据集目录："
+                              f"请用 --output 指定其它目录，或先将该文件改名")
+    watermark_path = os.path.join(out_dir, '_watermark.json')
+    os.makedirs(out_dir, exist_ok=True)
+    watermark = {'version': 2, 'parts': []}
+    if os.path.exists(watermark_path):
+        with open(watermark_path, encoding='utf-8') as f:
+            watermark = json.load(f)
+        if watermark.get('version') != 2 and not rebuild:
+            raise ValueError(f"{watermark_path} 是旧版本的增量记录（按文件行数），请加 --rebuild 重新全部清洗")
+
+    def save_watermark():
+        with open(watermark_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(watermark, f, ensure_ascii=False, indent=1)
+        os.replace(watermark_path + '.tmp', watermark_path)
+
+    def keys_path(name):
+        return os.path.join(out_dir, name.removesuffix('.arrow') + '.keys.npy')
+
+    if rebuild:
+        watermark = {'version': 2, 'parts': []}
+        save_watermark()
+    # 记录中的分片如果还是 .tmp（上次在改名前中断），改名提交；记录中没有的分片（写了一半）直接删除
+    for name in watermark['parts']:
+        part = os.path.join(out_dir, name)
+        if os.path.exists(part + '.tmp'):
+            os.replace(part + '.tmp', part)
+    committed = set(watermark['parts']) | {os.path.basename(keys_path(name)) for name in watermark['parts']}
+    for name in os.listdir(out_dir):
+        if name.startswith('part-') and name.removesuffix('.tmp') not in committed:
+            os.remove(os.path.join(out_dir, name))
+
+    seen = np.unique(np.concatenate([np.load(keys_path(name)) for name in watermark['parts']]
+                                    + [np.empty(0, dtype=np.uint64)]))
+    new_rows = 0
+    for path in input_paths:
+        for chunk in iter_listings(path, chunk_rows):
+            keys = listing_keys(chunk)
+            # 没有处理过的房源，同一房源在块内出现多次时只保留第一行
+            unique_keys, first = np.unique(keys, return_index=True)
+            rows = np.sort(first[~np.isin(unique_keys, seen, assume_unique=True)])
+            if len(rows) == 0:
+                continue
+            chunk, keys = chunk.iloc[rows], keys[rows]
+            name = f"part-{len(watermark['parts']):05d}.arrow"
+            part = os.path.join(out_dir, name)
+            write_dataset(clean(chunk), part + '.tmp')
+            np.save(keys_path(name), keys)
+            watermark['parts'].append(name)
+            save_watermark()
+            os.replace(part + '.tmp', part)
+            seen = np.union1d(seen, keys)
+            new_rows += len(chunk)
+    return new_rows
+
+
+if __name__ == '__main__':
+    import argparse
+    import os
+
+    from dataset import default_path, write_dataset
+
+    parser = argparse.ArgumentParser(description='租房数据清洗')
+    parser.add_argument('--input', default='zufanglist4.xlsx', nargs='+',
+                        help='抓取结果（.xlsx / .parquet / .arrow / .csv），增量模式下可以是多个文件')
+    parser.add_argument('--output', default=None,
+                        help='输出文件，默认 extracted_data.arrow（统一数据集格式，见 dataset.py），也可以是 .xlsx / .csv；'
+                             '分块模式下为输出目录')
+    parser.add_argument('--chunked', action='store_true', help='分块多进程清洗，按 省份/城市 分区写出 parquet')
+    parser.add_argument('--workers', type=int, default=None, help='分块模式的进程数，默认为CPU核数')
+    parser.add_argument('--chunk-rows', type=int, default=200000, help='分块模式、增量模式每块行数')
+    parser.add_argument('--incremental', action='store_true',
+                        help='增量模式：只清洗之前没有处理过的房源，追加到数据集目录（默认 extracted_data.arrow）')
+    parser.add_argument('--rebuild', action='store_true', help='增量模式下删除已清洗的数据，重新清洗全部输入')
+    args = parser.parse_args()
+    inputs = [args.input] if isinstance(args.input, str) else args.input
+
+    if args.incremental:
+        out_dir = args.output or default_path
+        try:
+            rows = clean_incremental(inputs, out_dir, args.chunk_rows, args.rebuild)
+        except FileExistsError as e:
+            parser.error(str(e))
+        print(f"新增 {rows} 行数据已追加到 {out_dir}")
+    elif args.chunked:
+        out_dir = args.output or 'extracted_data'
+        rows = clean_chunked(inputs, out_dir, args.workers, args.chunk_rows)
+        print(f"{rows} 行数据已保存到 {out_dir}")
+    else:
+        # 读取原始数据
+        from pachong_sink import iter_listings
+
+        df = pd.concat([chunk for path in inputs for chunk in iter_listings(path)], ignore_index=True)
+
+        df_extracted = clean(df)
+
+        # 显示结果
+        print(df_extracted)
+
+        # 保存为统一格式的数据集，分析和训练脚本直接读取
+        save_path = args.output or default_path
+        if os.path.isdir(save_path):
+            parser.error(f"{save_path} 是增量模式的数据集目录：全量清洗请用 --output 指定文件，"
+                         f"或用 --incremental --rebuild 重建该目录")
+        if save_path.endswith('.xlsx'):
+            df_extracted.to_excel(save_path, index=False, engine='openpyxl')
+        elif save_path.endswith('.csv'):
+            df_extracted.rename(columns={'价格': '月租'}).to_csv(save_path, index=False, encoding='utf-8-sig')
+        else:
+            write_dataset(df_extracted, save_path)
+
+        print(f"数据已保存到 {save_path}")
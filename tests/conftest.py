@@ -0,0 +1,6 @@
+import os
+import sys
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# XGBoost 目录下的脚本按同目录导入（from bundle import ...）
+sys.path[:0] = [root, os.path.join(root, 'XGBoost')]
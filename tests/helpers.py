@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+
+from dataset import read_dataset
+from fenxi_agg import other_region, region_mapping
+
+
+def rank_error(values, estimate, q=0.5):
+    """estimate 作为 q 分位数时在 values 中的归一化秩误差（落在相同值的秩区间内为 0）"""
+    values = np.sort(values)
+    low = np.searchsorted(values, estimate, 'left') / len(values)
+    high = np.searchsorted(values, estimate, 'right') / len(values)
+    return 0.0 if low <= q <= high else min(abs(low - q), abs(high - q))
+
+
+def median_rank_errors(data, medians):
+    """各地区近似中位数的秩误差，data 为数据集路径或 DataFrame"""
+    df = read_dataset(data, columns=['城市', '月租']) if isinstance(data, str) else data
+    regions = df['城市'].astype(object).map(region_mapping).fillna(other_region)
+    errors = {}
+    for region, median in medians.items():
+        errors[region] = rank_error(df['月租'][regions == region].dropna().to_numpy(), median)
+    return pd.Series(errors)
+
+
+def assert_stats_equal(expected, actual, approximate_median=False):
+    """两个 region_stats 格式的统计表相同；approximate_median 时不比较中位月租"""
+    if approximate_median:
+        expected, actual = expected.drop(columns='中位月租'), actual.drop(columns='中位月租')
+    pd.testing.assert_frame_equal(expected, actual, check_exact=False, rtol=1e-9, atol=1e-6)
@@ -0,0 +1,41 @@
+"""fenxi_backends：各后端的统计表与 pandas 后端相同"""
+import os
+import shutil
+
+import pytest
+
+from benchmarks.synth import write_dataset_file
+from fenxi_backends import available, region_stats
+from helpers import assert_stats_equal, median_rank_errors
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope='module', params=['synthetic', 'csv'])
+def dataset_path(request, tmp_path_factory):
+    if request.param == 'csv':
+        return os.path.join(root, 'extracted_data.csv')
+    return write_dataset_file(str(tmp_path_factory.mktemp('data') / 'extracted_data.arrow'), 300_000, seed=1,
+                              chunk_rows=100_000)
+
+
+@pytest.fixture(scope='module')
+def expected(dataset_path):
+    return region_stats(dataset_path, 'pandas')[0]
+
+
+def test_duckdb(dataset_path, expected):
+    pytest.importorskip('duckdb')
+    assert_stats_equal(expected, region_stats(dataset_path, 'duckdb')[0])
+
+
+def test_stream(dataset_path, expected):
+    stats = region_stats(dataset_path, 'stream', chunk_rows=50_000, median_error=0.005)[0]
+    assert_stats_equal(expected, stats, approximate_median=True)
+    assert median_rank_errors(dataset_path, stats['中位月租']).max() <= 0.005
+
+
+@pytest.mark.skipif(not available('spark') or not (shutil.which('java') or os.environ.get('JAVA_HOME')),
+                    reason='需要 pyspark 和 Java')
+def test_spark(dataset_path, expected):
+    assert_stats_equal(expected, region_stats(dataset_path, 'spark', master='local[1]')[0])
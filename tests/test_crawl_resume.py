@@ -0,0 +1,57 @@
+"""断点续爬：重跑时断点中已完成的页不会再次写出"""
+import asyncio
+
+import pachong
+from benchmarks.replay_server import start_server
+from benchmarks.synth import make_page
+from pachong_async import crawl_async
+from pachong_cache import Checkpoint, PageCache
+from pachong_sink import ListingSink, iter_listings
+
+
+def crawl(path, cache_dir, url, pages, append=True):
+    cache = PageCache(str(cache_dir))
+    checkpoint = Checkpoint(str(cache_dir / 'checkpoint.jsonl'))
+    with ListingSink(str(path), batch_size=50, append=append) as sink:
+        asyncio.run(crawl_async([(url, pages, '城市0', '省份0')], {}, delay=(0, 0), cache=cache,
+                                checkpoint=checkpoint, workers=1, sink=sink, replay=not sink.append))
+    return sink
+
+
+def row_count(path):
+    return sum(len(df) for df in iter_listings(str(path)))
+
+
+def test_rerun_does_not_rewrite_checkpointed_pages(tmp_path):
+    server = start_server(items=10)
+    url = f"http://127.0.0.1:{server.server_address[1]}/zufang/pg{{}}/"
+    path, cache_dir = tmp_path / 'zufang.parquet', tmp_path / 'crawl_cache'
+    try:
+        assert crawl(path, cache_dir, url, 3).rows_written == 30
+        # 不去重时重跑：前 3 页已在断点中，只抓第 4 页
+        sink = crawl(path, cache_dir, url, 4)
+        assert (sink.rows_kept, sink.rows_written) == (30, 10)
+        assert row_count(path) == 40
+        # 清空输出文件时已完成的页从缓存重新写出
+        assert crawl(path, cache_dir, url, 4, append=False).rows_written == 40
+        assert row_count(path) == 40
+    finally:
+        server.shutdown()
+
+
+class FakeResponse:
+    text = make_page(0, items=5)
+
+    def raise_for_status(self):
+        pass
+
+
+def test_checkpoint_without_cache_refetches(tmp_path, monkeypatch):
+    monkeypatch.setattr(pachong.time, 'sleep', lambda seconds: None)
+    monkeypatch.setattr(pachong.requests, 'get', lambda url, headers=None: FakeResponse())
+    monkeypatch.setattr(pachong, 'data_list', [])
+    checkpoint = Checkpoint(str(tmp_path / 'checkpoint.jsonl'))
+    checkpoint.mark('深圳', 1)
+    # 有断点但没有缓存时无法重放，重新请求该页
+    pachong.fetch_data('https://sz.lianjia.com/zufang/pg{}/#contentList', 1, cache=None, checkpoint=checkpoint)
+    assert len(pachong.data_list) == 5
@@ -0,0 +1,34 @@
+"""fenxi_cube：立方体汇总与全量计算一致"""
+import pytest
+
+from benchmarks.synth import write_dataset_file
+from fenxi_backends import region_stats
+from fenxi_cube import Cube
+from helpers import assert_stats_equal, median_rank_errors
+
+
+def test_cube_matches_region_stats(tmp_path):
+    path = write_dataset_file(str(tmp_path / 'extracted_data.arrow'), 200_000, seed=2)
+    expected = region_stats(path, 'pandas')[0]
+    cube = Cube.build(path, chunk_rows=50_000)
+    stats = cube.region_stats()
+    assert_stats_equal(expected, stats, approximate_median=True)
+    assert median_rank_errors(path, stats['中位月租']).max() <= 0.005
+
+    # 保存再加载后查询结果不变；按地区查询与统计表的对应行一致
+    cube.save(str(tmp_path / 'rent_cube.arrow'))
+    loaded = Cube.load(str(tmp_path / 'rent_cube.arrow'))
+    for region, row in expected.iterrows():
+        result = loaded.query(地区=region)
+        assert result['数量'] == row['数量']
+        assert result['平均月租'] == pytest.approx(row['平均月租'], rel=1e-9)
+        assert result['平均面积'] == pytest.approx(row['平均面积'], rel=1e-9)
+
+
+
+def test_unknown_dimension(tmp_path):
+    cube = Cube.build(write_dataset_file(str(tmp_path / 'extracted_data.arrow'), 1000, seed=3))
+    with pytest.raises(ValueError, match='未知的维度 省份'):
+        cube.rollup(['省份'])
+    with pytest.raises(ValueError, match='未知的维度 省份'):
+        cube.query(省份='北京')
@@ -0,0 +1,78 @@
+"""优化后的实现与原来的实现结果一致（基准测试中的对照实现见 benchmarks/）"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost as xgb
+
+from benchmarks.bench_clean import clean_apply, make_raw
+from benchmarks.bench_parse import parse_page_bs
+from benchmarks.synth import make_dataset, make_page
+from bundle import ModelBundle
+from fenxi_agg import region_stats
+from fenxi_stream import KLLSketch, StreamingStats, kll_k
+from helpers import assert_stats_equal, median_rank_errors, rank_error
+from pachong_parse import parse_page
+from shujuqingxi import clean
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_clean_matches_apply(monkeypatch):
+    # make_raw 从 zufanglist4.xlsx 抽样，并混入 面议、没有面积和楼层的房屋信息
+    monkeypatch.chdir(root)
+    df = make_raw(20000, seed=1)
+    pd.testing.assert_frame_equal(clean(df).reset_index(drop=True), clean_apply(df).reset_index(drop=True))
+
+
+def test_xpath_parser_matches_beautifulsoup():
+    for seed in range(20):
+        html = make_page(seed)
+        assert parse_page(html, '广东', '深圳') == parse_page_bs(html, '广东', '深圳')
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_kll_rank_error(seed):
+    rng = np.random.default_rng(seed)
+    values = rng.lognormal(8, 0.6, 300_000).round()
+    error = 0.005
+    sketch = KLLSketch(kll_k(error), seed=seed)
+    for chunk in np.array_split(values, 30):
+        sketch.update(chunk)
+    assert sketch.size() < 4 * kll_k(error)
+    for q in [0.1, 0.5, 0.9]:
+        assert rank_error(values, sketch.quantile(q), q) <= error
+
+
+def test_streaming_merge_matches_region_stats():
+    df = make_dataset(200_000, seed=4)
+    # 两份状态分别处理一半数据（各自分块），合并后与全量计算一致
+    parts = []
+    for half in np.array_split(np.arange(len(df)), 2):
+        state = StreamingStats(0.005, seed=len(parts))
+        for rows in np.array_split(half, 4):
+            state.update(df.iloc[rows])
+        parts.append(state)
+    stats = parts[0].merge(parts[1]).result()
+    expected = region_stats(df)
+    assert list(stats.index) == list(expected.index)
+    assert_stats_equal(expected.astype(float), stats.astype(float), approximate_median=True)
+    assert median_rank_errors(df, stats['中位月租']).max() <= 0.005
+
+
+def test_bundle_predict_matches_booster(tmp_path):
+    data = make_dataset(5000, seed=5)
+    cities = list(data['城市'].cat.categories)
+    X = pd.DataFrame({'城市': data['城市'], '房屋面积': data['面积'], '楼层': data['楼层类型']})
+    booster = xgb.train({'max_depth': 4, 'nthread': 1}, xgb.DMatrix(X, label=data['月租'], enable_categorical=True),
+                        20)
+    bundle = ModelBundle(booster, cities, ['城市', '房屋面积', '楼层'])
+    expected = booster.predict(xgb.DMatrix(X, enable_categorical=True))
+    predictions = bundle.predict(data['城市'].astype(str).tolist(), data['面积'], data['楼层类型'])
+    np.testing.assert_allclose(predictions, expected, rtol=1e-6)
+    # 保存再加载（版本 2 模型包）后结果不变
+    loaded = ModelBundle.load(bundle.save(str(tmp_path / 'rent_model.json')))
+    assert loaded.version == 2
+    np.testing.assert_array_equal(loaded.predict(data['城市'].astype(str).tolist(), data['面积'], data['楼层类型']),
+                                  predictions)
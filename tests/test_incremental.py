@@ -0,0 +1,60 @@
+"""shujuqingxi.clean_incremental：抓取结果被重写后再次增量清洗"""
+import pandas as pd
+import pytest
+
+from dataset import read_dataset
+from pachong_parse import columns
+from pachong_sink import ListingSink
+from shujuqingxi import clean_incremental
+
+
+def listing(i):
+    return ['广东', '深圳', f'南山-{i}', f'{50 + i}㎡|中楼层 （{10 + i}层）|2室1厅1卫', '链家', '7天前维护',
+            str(3000 + i * 100), '元/月']
+
+
+def crawl(path, listings):
+    # 与 pachong.py --overwrite 相同：每次抓取重写原始文件
+    with ListingSink(str(path), batch_size=2) as sink:
+        sink.write(listings)
+
+
+def dataset_rents(out_dir):
+    return sorted(read_dataset(str(out_dir))['月租'].tolist())
+
+
+def test_rewritten_raw_file_keeps_history(tmp_path):
+    raw, out_dir = tmp_path / 'zufanglist4.parquet', tmp_path / 'extracted_data.arrow'
+    crawl(raw, [listing(i) for i in range(5)])
+    assert clean_incremental([str(raw)], str(out_dir), chunk_rows=2) == 5
+    # 第二天原始文件被重写，只剩一条旧房源和两条新房源，比第一天短
+    crawl(raw, [listing(4), listing(5), listing(6)])
+    assert clean_incremental([str(raw)], str(out_dir), chunk_rows=2) == 2
+    assert dataset_rents(out_dir) == [3000 + i * 100 for i in range(7)]
+    # 原样重跑不新增
+    assert clean_incremental([str(raw)], str(out_dir)) == 0
+    assert len(read_dataset(str(out_dir))) == 7
+
+
+def test_duplicate_listings_cleaned_once(tmp_path):
+    raw, out_dir = tmp_path / 'zufanglist4.csv', tmp_path / 'extracted_data.arrow'
+    pd.DataFrame([listing(1), listing(1), listing(2)], columns=columns).to_csv(raw, index=False)
+    assert clean_incremental([str(raw)], str(out_dir)) == 2
+
+
+def test_rebuild(tmp_path):
+    raw, out_dir = tmp_path / 'zufanglist4.parquet', tmp_path / 'extracted_data.arrow'
+    crawl(raw, [listing(i) for i in range(3)])
+    clean_incremental([str(raw)], str(out_dir))
+    crawl(raw, [listing(0)])
+    assert clean_incremental([str(raw)], str(out_dir), rebuild=True) == 1
+    assert dataset_rents(out_dir) == [3000]
+
+
+def test_refuses_single_file_dataset(tmp_path):
+    raw, out_path = tmp_path / 'zufanglist4.parquet', tmp_path / 'extracted_data.arrow'
+    crawl(raw, [listing(0)])
+    out_path.write_bytes(b'full dataset')
+    with pytest.raises(FileExistsError):
+        clean_incremental([str(raw)], str(out_path))
+    assert out_path.read_bytes() == b'full dataset'
@@ -0,0 +1,64 @@
+"""ListingSink + DedupIndex：两次抓取写同一个输出文件"""
+import pytest
+
+from pachong_dedup import DedupIndex
+from pachong_sink import ListingSink, iter_listings
+
+
+def listing(i, price='3000'):
+    return ['广东', '深圳', f'南山-{i}', f'{50 + i}㎡|南|2室1厅1卫', '链家', '2024-01-01', price, '元/月']
+
+
+def crawl(path, index_path, rows, append=True):
+    with ListingSink(path, batch_size=2, dedup=DedupIndex(index_path, capacity=1000), append=append) as sink:
+        sink.write(rows)
+    return sink
+
+
+def read_rows(path):
+    return [list(row) for df in iter_listings(path) for row in df.itertuples(index=False)]
+
+
+@pytest.mark.parametrize('ext', ['.parquet', '.arrow', '.csv'])
+def test_rerun_keeps_previous_rows(tmp_path, ext):
+    path, index_path = str(tmp_path / f'zufang{ext}'), str(tmp_path / 'dedup.bloom')
+    first = [listing(i) for i in range(5)]
+    crawl(path, index_path, first)
+    # 第二次抓取：列表移动后一半是上次见过的房源
+    sink = crawl(path, index_path, first[2:] + [listing(i) for i in range(5, 8)])
+    assert (sink.rows_kept, sink.rows_written, sink.rows_dropped) == (5, 3, 3)
+    assert read_rows(path) == first + [listing(i) for i in range(5, 8)]
+    # 再跑一次完全相同的抓取，文件不变
+    crawl(path, index_path, first)
+    assert len(read_rows(path)) == 8
+
+
+def test_overwrite_resets_index(tmp_path):
+    path, index_path = str(tmp_path / 'zufang.parquet'), str(tmp_path / 'dedup.bloom')
+    rows = [listing(i) for i in range(4)]
+    crawl(path, index_path, rows)
+    # 清空输出文件时索引也清空，同样的房源不会被当作重复丢掉
+    sink = crawl(path, index_path, rows, append=False)
+    assert (sink.rows_kept, sink.rows_written, sink.rows_dropped) == (0, 4, 0)
+    assert read_rows(path) == rows
+
+
+def test_missing_output_resets_stale_index(tmp_path):
+    path, index_path = tmp_path / 'zufang.parquet', str(tmp_path / 'dedup.bloom')
+    rows = [listing(i) for i in range(3)]
+    crawl(str(path), index_path, rows)
+    path.unlink()
+    crawl(str(path), index_path, rows)
+    assert read_rows(str(path)) == rows
+
+
+def test_index_saved_when_interrupted(tmp_path):
+    path, index_path = str(tmp_path / 'zufang.parquet'), str(tmp_path / 'dedup.bloom')
+    with pytest.raises(KeyboardInterrupt):
+        with ListingSink(path, batch_size=2, dedup=DedupIndex(index_path, capacity=1000), append=True) as sink:
+            sink.write([listing(i) for i in range(3)])
+            raise KeyboardInterrupt
+    # 中断前写出的行和索引一起保留，重跑时这些房源不会重复写出
+    sink = crawl(path, index_path, [listing(i) for i in range(5)])
+    assert (sink.rows_kept, sink.rows_written, sink.rows_dropped) == (3, 2, 3)
+    assert read_rows(path) == [listing(i) for i in range(5)]
@@ -0,0 +1,27 @@
+"""XGBoost/search.py：successive halving 每一轮重新分配线程"""
+import json
+
+import numpy as np
+import xgboost as xgb
+
+from search import param_space, sample_candidates, successive_halving
+
+
+def model_threads(booster):
+    return int(json.loads(booster.save_config())['learner']['generic_param']['nthread'])
+
+
+def test_threads_follow_survivors():
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(2000, 4)).astype(np.float32)
+    y = x @ np.array([3, -2, 1, 0.5]) + rng.normal(size=2000)
+    dtrain = xgb.QuantileDMatrix(x[:1500], label=y[:1500])
+    dvalid = xgb.QuantileDMatrix(x[1500:], label=y[1500:], ref=dtrain)
+    log = []
+    result = successive_halving(dtrain, dvalid, sample_candidates(param_space, 9), {'eval_metric': 'rmse'},
+                                min_rounds=2, max_rounds=18, device='cpu', threads=9,
+                                early_stopping_rounds=None, log=log.append)
+    # 9 个候选: 9 并行 × 1 线程 -> 3 × 3 -> 最后一个候选独占 9 个线程
+    assert ['9 个并行 × 1 线程' in log[0], '3 个并行 × 3 线程' in log[1], '1 个并行 × 9 线程' in log[2]] == [True] * 3
+    assert model_threads(result['booster']) == 9
+    assert sorted(t['rounds'] for t in result['trials']) == [2] * 6 + [6] * 2 + [18]
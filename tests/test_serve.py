@@ -0,0 +1,43 @@
+"""XGBoost/serve.py：预测出错时返回 500，连接保持可用"""
+import http.client
+import json
+import threading
+from urllib.parse import urlencode
+
+import numpy as np
+import xgboost as xgb
+
+from bundle import ModelBundle
+from serve import PredictionServer
+
+
+def test_prediction_error_returns_500(tmp_path):
+    x = np.column_stack([np.arange(40) % 2, np.arange(40), np.arange(40) % 3]).astype(np.float32)
+    booster = xgb.train({'nthread': 1}, xgb.DMatrix(x, label=np.arange(40.0), feature_types=['c', 'q', 'q'],
+                                                    enable_categorical=True), 2)
+    path = ModelBundle(booster, ['北京', '上海'], ['城市', '房屋面积', '楼层']).save(str(tmp_path / 'rent_model.json'))
+    server = PredictionServer(('127.0.0.1', 0), path, max_wait=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    conn = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=10)
+    try:
+        conn.request('GET', '/predict?' + urlencode({'城市': '北京', '面积': 80, '楼层': 2}))
+        response = conn.getresponse()
+        assert response.status == 200 and json.loads(response.read())['预测月租'] is not None
+        conn.request('GET', '/predict?' + urlencode({'城市': '北京', '面积': 'x', '楼层': 2}))
+        response = conn.getresponse()
+        assert response.status == 400 and json.loads(response.read())['error']
+
+        def broken(x, *args, **kwargs):
+            raise xgb.core.XGBoostError('boom')
+
+        server.bundle.booster.inplace_predict = broken
+        conn.request('GET', '/predict?' + urlencode({'城市': '北京', '面积': 81, '楼层': 2}))
+        response = conn.getresponse()
+        assert response.status == 500 and 'boom' in json.loads(response.read())['error']
+        # 同一个 keep-alive 连接继续可用
+        conn.request('GET', '/health')
+        assert conn.getresponse().status == 200
+    finally:
+        conn.close()
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,53 @@
+"""fenxi_server：数据集更新过程中的版本检查和重新加载"""
+import os
+
+import fenxi_server
+from benchmarks.synth import make_dataset
+from dataset import write_dataset
+
+
+def make_parts(out_dir, count):
+    os.makedirs(out_dir, exist_ok=True)
+    for i in range(count):
+        write_dataset(make_dataset(1000, seed=i), os.path.join(out_dir, f'part-{i:05d}.arrow'))
+
+
+def test_data_version_skips_tmp_and_vanished_files(tmp_path, monkeypatch):
+    out_dir = str(tmp_path / 'extracted_data.arrow')
+    make_parts(out_dir, 2)
+    version = fenxi_server.data_version(out_dir)
+    # 增量清洗写了一半的 .tmp 不改变版本
+    open(os.path.join(out_dir, 'part-00002.arrow.tmp'), 'wb').close()
+    assert fenxi_server.data_version(out_dir) == version
+
+    # 遍历之后、stat 之前被改名的文件跳过
+    stat = os.stat
+
+    def vanishing_stat(path, *args, **kwargs):
+        if path.endswith('part-00001.arrow'):
+            raise FileNotFoundError(path)
+        return stat(path, *args, **kwargs)
+
+    monkeypatch.setattr(fenxi_server.os, 'stat', vanishing_stat)
+    assert [entry[0] for entry in fenxi_server.data_version(out_dir)] == [os.path.join(out_dir, 'part-00000.arrow')]
+
+
+def test_refresh_keeps_serving_when_reload_fails(tmp_path, monkeypatch):
+    out_dir = str(tmp_path / 'extracted_data.arrow')
+    make_parts(out_dir, 1)
+    server = fenxi_server.QueryServer(('127.0.0.1', 0), out_dir, check_interval=0)
+    try:
+        data, version = server.data, server.version
+        make_parts(out_dir, 2)
+
+        def failing_load(path):
+            raise FileNotFoundError(path)
+
+        monkeypatch.setattr(fenxi_server, 'ResidentData', failing_load)
+        server.refresh()
+        assert (server.data, server.version) == (data, version)
+        monkeypatch.undo()
+        server.refresh()
+        assert server.data.total_rows == 2000
+    finally:
+        server.server_close()